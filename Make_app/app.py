@@ -1,12 +1,12 @@
 import streamlit as st
 import pandas as pd
-import joblib
 
 from preprocess import Fraud
+from src.models.artifact import load_artifact
 
 
-# Load model
-model = joblib.load('models/xgb_model.joblib')
+# Load the compiled model: memory-mapped node arrays shared by every app process
+model = load_artifact('models/xgb_model.mmap')
 
 pipeline = Fraud()
 
@@ -1,12 +1,21 @@
-import joblib
 import inflection
-import pandas as pd
+
+from src.data.schema import apply_schema
+from src.features.velocity import VELOCITY_COLUMNS
+from src.models.artifact import load_artifact
+from src.models.threshold import model_scores, predict_labels
 
 class Fraud:
     
     def __init__(self):
-        self.minmaxscaler = joblib.load('parameters\minmax_scaler.joblib')
-        self.onehotencoder = joblib.load('parameters\one_hot_encoder.joblib')
+        # One-hot encoding, scaling and column selection fitted by finefeature.py
+        # (JSON artifact, no unpickling)
+        self.preprocessor = load_artifact('parameters/preprocessor.mmap')
+        # Velocity features need the account history, which a single request does not carry
+        velocity = [col for col in self.preprocessor.input_columns if col in VELOCITY_COLUMNS]
+        if velocity:
+            raise ValueError(f"❌ The saved preprocessor needs the velocity features {velocity}, which the app "
+                             "cannot compute; retrain with finefeature.include_velocity: false to serve it")
         
     def data_cleaning(self, df1):
         cols_old = df1.columns.tolist()
@@ -16,7 +25,8 @@ class Fraud:
         
         df1.columns = cols_new
         
-        return df1
+        # compact dtypes shared with the training pipeline
+        return apply_schema(df1)
     
     def feature_engineering(self, df2):
         # step
@@ -37,21 +47,12 @@ class Fraud:
                       'step_weeks', 'step_days'], axis=1)
     
     def data_preparation(self, df3):
-        # OneHotEncoder
-        df3 = self.onehotencoder.transform(df3)
-
-        # Rescaling 
-        num_columns = ['amount', 'oldbalance_org', 'newbalance_orig', 'oldbalance_dest', 
-                       'newbalance_dest', 'diff_new_old_balance', 'diff_new_old_destiny']
-        df3[num_columns] = self.minmaxscaler.transform(df3[num_columns])
-        
-        # selected columns
-        final_columns_selected = ['step', 'oldbalance_org', 'newbalance_orig', 'newbalance_dest', 
-                                  'diff_new_old_balance', 'diff_new_old_destiny', 'type_TRANSFER']
-        return df3[final_columns_selected]
+        # Same fused transform as the training pipeline
+        return self.preprocessor.transform(df3)
     
     def get_prediction(self, model, original_data, test_data):
-        pred = model.predict(test_data)
-        original_data['prediction'] = pred
+        # Label at the decision threshold stored with the model, not a fixed 0.5
+        original_data['fraud_score'] = model_scores(model, test_data)
+        original_data['prediction'] = predict_labels(model, test_data)
         
         return original_data.to_json(orient="records", date_format="iso")
\ No newline at end of file
@@ -3,6 +3,8 @@ import seaborn as sns
 import pandas as pd
 from pathlib import Path
 
+from src.data.storage import read_table
+
 def save_plot(fig, filename, output_dir='reports/figures/bivariate_analysis'):
     """Helper function to save plots consistently"""
     output_path = Path(output_dir) / filename
@@ -99,7 +101,7 @@ if __name__ == "__main__":
         data_path = Path('data/interim/featured_data.csv')
         print(f"Loading data from: {data_path}")
         
-        df = pd.read_csv(data_path)
+        df = read_table(data_path, columns=['is_fraud', 'type', 'amount', 'name_orig', 'name_dest'])
         print(f"Data loaded successfully. Shape: {df.shape}")
         
         # Generate plots
@@ -4,6 +4,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from src.data.storage import read_table
+
 def plot_correlation_matrix(df, output_path='reports/figures/correlation_matrix.png'):
     """
     Plots a professional correlation matrix heatmap for numerical variables
@@ -95,7 +97,7 @@ if __name__ == "__main__":
         data_path = Path('data/interim/featured_data.csv')
         print(f"Loading data from: {data_path}")
         
-        df = pd.read_csv(data_path)
+        df = read_table(data_path)
         print("✔ Data loaded successfully")
         
         # Generate and save correlation matrix
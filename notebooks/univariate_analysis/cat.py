@@ -4,6 +4,8 @@ import pandas as pd
 from pathlib import Path
 import numpy as np
 
+from src.data.storage import read_table
+
 def plot_categorical_distributions(df, output_path=Path('reports/figures/categorical_distribution.png')
 , max_categories=10):
     """
@@ -94,7 +96,7 @@ if __name__ == "__main__":
         data_path = Path('data/interim/featured_data.csv')  # Update path
         print(f"Loading data from: {data_path}")
         
-        df = pd.read_csv(data_path)
+        df = read_table(data_path, columns=['type', 'name_orig', 'name_dest'])
         print("✔ Data loaded successfully")
         
         # Generate and save plots
@@ -4,6 +4,8 @@ import os
 import pandas as pd
 from pathlib import Path  # Better path handling
 
+from src.data.storage import read_table
+
 def plot_fraud_distribution(df, output_path='reports/figures/fraud_distribution.png'):
     """
     Plots and saves fraud distribution plot with percentage annotations
@@ -69,7 +71,7 @@ if __name__ == "__main__":
         data_path = Path('data/interim/featured_data.csv')
         print(f"Loading data from: {data_path}")
         
-        df = pd.read_csv(data_path)
+        df = read_table(data_path, columns=['is_fraud'])
         print("✔ Data loaded successfully")
         
         # Generate and save plot
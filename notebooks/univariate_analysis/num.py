@@ -4,6 +4,8 @@ import pandas as pd
 from pathlib import Path
 import os
 
+from src.data.storage import read_table
+
 def plot_numerical_distributions(df, output_path=Path('reports/figures/numerical_distribution.png')
 , max_categories=10):
     """
@@ -83,7 +85,7 @@ if __name__ == "__main__":
         data_path = Path('data/interim/featured_data.csv')  # Update path
         print(f"Loading data from: {data_path}")
         
-        df = pd.read_csv(data_path)
+        df = read_table(data_path)
         print("✔ Data loaded successfully")
         
         # Generate and save plots
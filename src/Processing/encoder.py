@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from src.data.schema import TRANSACTION_TYPES
+
+# Up to this many rows codes are looked up per value (the single-prediction path)
+SMALL_BATCH = 64
+
+
+class TypeOneHotEncoder:
+    """One-hot encoder for `type` over the fixed vocabulary of known transaction types
+
+    Values map to integer codes (the categorical codes when `type` already has the
+    schema dtype) and the one-hot block is written in one vectorized numpy step.
+    Unknown values encode as all zeros. The pickled object only holds the
+    vocabulary and column names, so the artifact is a few hundred bytes.
+    """
+
+    def __init__(self, column='type', categories=TRANSACTION_TYPES):
+        self.column = column
+        self.categories = list(categories)
+        self.feature_names_in_ = None
+        self._lookup = {cat: code for code, cat in enumerate(self.categories)}
+
+    def fit(self, X, y=None):
+        """Record the input column order; the vocabulary itself is fixed"""
+        self.feature_names_in_ = list(X.columns)
+        if self.column not in self.feature_names_in_:
+            raise ValueError(f"❌ Column '{self.column}' not found in the data to encode")
+        return self
+
+    def fit_transform(self, X, y=None):
+        return self.fit(X).transform(X)
+
+    @property
+    def onehot_columns(self):
+        return [f'{self.column}_{cat}' for cat in self.categories]
+
+    def get_feature_names_out(self):
+        """Input columns with `type` replaced in place by its one-hot columns"""
+        names = []
+        for col in self.feature_names_in_:
+            names += self.onehot_columns if col == self.column else [col]
+        return np.array(names, dtype=object)
+
+    def codes(self, values):
+        """Integer code of each value in the vocabulary, -1 for unknown values"""
+        if not isinstance(values, pd.Series):
+            values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype) and list(values.cat.categories) == self.categories:
+            return values.cat.codes.to_numpy()
+        if len(values) <= SMALL_BATCH:
+            # Plain dict lookups beat building a Categorical for a handful of rows
+            return np.fromiter((self._lookup.get(v, -1) for v in values.to_numpy()),
+                               dtype=np.int8, count=len(values))
+        return pd.Categorical(values, categories=self.categories).codes
+
+    def encode(self, values):
+        """(n_rows, n_categories) int8 one-hot matrix for a sequence of type values"""
+        codes = self.codes(values)
+        out = np.zeros((len(codes), len(self.categories)), dtype=np.int8)
+        known = codes >= 0
+        out[np.flatnonzero(known), codes[known]] = 1
+        return out
+
+    def transform(self, X):
+        """Replace `type` by its one-hot columns, keeping every other column as is"""
+        onehot = self.encode(X[self.column])
+        data = {}
+        for col in X.columns:
+            if col == self.column:
+                data.update(zip(self.onehot_columns, onehot.T))
+            else:
+                data[col] = X[col].to_numpy()
+        return pd.DataFrame(data, index=X.index)
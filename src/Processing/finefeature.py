@@ -1,33 +1,58 @@
-import pandas as pd
 import os
+import joblib
 
-# Define final selected features
-final_columns_selected = [
-    'step', 'oldbalance_org', 
-    'newbalance_orig', 'newbalance_dest', 
-    'diff_new_old_balance', 'diff_new_old_destiny', 
-    'type_TRANSFER'
-]
-
-X_train=pd.read_csv('data\processed\scaling\X_train_scaled.csv')
-X_test=pd.read_csv('data\processed\scaling\X_test_scaled.csv')
-X_valid=pd.read_csv('data\processed\scaling\X_valid_scaled.csv')
-
-# Select features from each dataset
-X_train_cs = X_train[final_columns_selected]
-X_valid_cs = X_valid[final_columns_selected]
-# X_temp_cs = X_temp[final_columns_selected]
-X_test_cs = X_test[final_columns_selected]
-# X_params_cs = X_params[final_columns_selected]
-
-# Create directory if it doesn't exist
-os.makedirs('data/processed/finefeatures', exist_ok=True)
-
-# Save datasets to CSV
-X_train_cs.to_csv('data/processed/finefeatures/X_train_finalfeatures.csv', index=False)
-X_valid_cs.to_csv('data/processed/finefeatures/X_valid_finalfeatures.csv', index=False)
-# X_temp_cs.to_csv('data/processed/finefeatures/X_temp_finalfeatures.csv', index=False)
-X_test_cs.to_csv('data/processed/finefeatures/X_test_finalfeatures.csv', index=False)
-# X_params_cs.to_csv('data/processed/finefeatures/X_params_finalfeatures.csv', index=False)
-
-print("✅ Final features saved in 'data/processed/finefeatures'")
\ No newline at end of file
+from src.data.feature_store import materialize
+from src.data.schema import report_memory
+from src.data.storage import write_table
+from src.models.artifact import PREPROCESSOR_ARTIFACT, save_preprocessor
+from src.Processing.selection import final_columns
+from src.Processing.splitting import load_split
+from src.Processing.transformer import FraudPreprocessor
+from src.stage_cache import run_stage
+
+PREPROCESSOR_PATH = 'parameters/preprocessor.joblib'
+
+
+def build_preprocessor(columns, encoder=None, scaler=None, encoder_path='parameters/one_hot_encoder.joblib',
+                       scaler_path='parameters/minmax_scaler.joblib', output_path=PREPROCESSOR_PATH):
+    """Fuse the fitted encoder and scaler (loaded from disk unless given) into the transformer shared with the app"""
+    encoder = joblib.load(encoder_path) if encoder is None else encoder
+    scaler = joblib.load(scaler_path) if scaler is None else scaler
+    preprocessor = FraudPreprocessor.from_fitted(encoder, scaler, columns)
+    joblib.dump(preprocessor, output_path)
+    # Memory-mapped copy loaded by the app without unpickling
+    save_preprocessor(preprocessor, PREPROCESSOR_ARTIFACT)
+    print(f"✅ Preprocessor saved to {output_path} and {PREPROCESSOR_ARTIFACT}")
+    return preprocessor
+
+
+def save_final_features(split, X_cs, y, output_dir='data/processed/finefeatures'):
+    """Write one split's final features and materialize it in the feature store"""
+    os.makedirs(output_dir, exist_ok=True)
+    if split == 'train':
+        report_memory(X_cs, 'finefeature')
+
+    write_table(X_cs, f'{output_dir}/X_{split}_finalfeatures.csv')
+    # Materialize the model inputs once as memory-mapped float32 arrays
+    materialize(split, X_cs, y)
+
+
+def select_final_features(preprocessor, output_dir='data/processed/finefeatures'):
+    """Encode, scale and select the final features straight from the split sets"""
+    for split, split_name in [('train', 'train'), ('valid', 'val'), ('test', 'test')]:
+        # Only the columns the preprocessor needs are read
+        X, y = load_split(split_name, columns=preprocessor.input_columns, stage=f'finefeature:{split}')
+        save_final_features(split, preprocessor.transform(X), y, output_dir)
+
+    print(f"✅ Final features saved in '{output_dir}'")
+    print("✅ Feature store saved in 'data/processed/feature_store'")
+
+
+def main():
+    """Build the shared preprocessor and the final feature sets"""
+    preprocessor = build_preprocessor(final_columns())
+    select_final_features(preprocessor)
+
+
+if __name__ == "__main__":
+    run_stage('finefeature', main)
@@ -1,9 +1,20 @@
-import pandas as pd
-from category_encoders import OneHotEncoder
 from pathlib import Path
 import os
 import joblib
 
+from src.config import load_params
+from src.data.storage import write_table
+from src.Processing.encoder import TypeOneHotEncoder
+from src.Processing.selection import final_columns, input_columns
+from src.Processing.splitting import load_split
+from src.stage_cache import run_stage
+
+def save_encoder(encoder, models_dir='parameters'):
+    """Save the fitted one-hot encoder"""
+    Path(models_dir).mkdir(parents=True, exist_ok=True)
+    joblib.dump(encoder, f'{models_dir}/one_hot_encoder.joblib')
+    print(f"✅ One-hot encoder saved to {models_dir}")
+
 def save_ohe_data(X_train, X_valid, X_test, encoder=None, output_dir='data/processed/ohe'):
     """Save one-hot encoded datasets and optionally the encoder"""
     try:
@@ -11,29 +22,26 @@ def save_ohe_data(X_train, X_valid, X_test, encoder=None, output_dir='data/proce
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
         # Save encoded data
-        X_train.to_csv(f'{output_dir}/X_train_ohe.csv', index=False)
-        X_valid.to_csv(f'{output_dir}/X_valid_ohe.csv', index=False)
-        X_test.to_csv(f'{output_dir}/X_test_ohe.csv', index=False)
+        write_table(X_train, f'{output_dir}/X_train_ohe.csv')
+        write_table(X_valid, f'{output_dir}/X_valid_ohe.csv')
+        write_table(X_test, f'{output_dir}/X_test_ohe.csv')
 
         # Save encoder if provided
         if encoder:
-            models_dir = 'parameters'
-            Path(models_dir).mkdir(parents=True, exist_ok=True)
-            joblib.dump(encoder, f'{models_dir}/one_hot_encoder.joblib')
-            print(f"✅ One-hot encoder saved to {models_dir}")
+            save_encoder(encoder)
         
         print(f"✅ One-hot encoded data saved to {output_dir}")
     except Exception as e:
         print(f"❌ Error saving one-hot encoded data: {e}")
         raise
 
-def apply_onehot_encoding(X_train, X_valid, X_test):
-    """Apply one-hot encoding to categorical features"""
+def apply_onehot_encoding(X_train, X_valid, X_test, columns=None):
+    """Apply one-hot encoding to categorical features, keeping only `columns` if given"""
     try:
         print("\nApplying one-hot encoding...")
         
         # Initialize encoder
-        ohe = OneHotEncoder(cols=['type'], use_cat_names=True)
+        ohe = TypeOneHotEncoder(column='type')
         
         # Fit and transform on training data
         X_train_ohe = ohe.fit_transform(X_train)
@@ -41,6 +49,11 @@ def apply_onehot_encoding(X_train, X_valid, X_test):
         # Transform validation and test data
         X_valid_ohe = ohe.transform(X_valid)
         X_test_ohe = ohe.transform(X_test)
+
+        if columns is not None:
+            # Drop the one-hot columns of types that are not selected
+            keep = [col for col in X_train_ohe.columns if col in columns]
+            X_train_ohe, X_valid_ohe, X_test_ohe = X_train_ohe[keep], X_valid_ohe[keep], X_test_ohe[keep]
         
         # Print feature information
         print(f"Original features: {X_train.columns.tolist()}")
@@ -53,18 +66,28 @@ def apply_onehot_encoding(X_train, X_valid, X_test):
         print(f"❌ Error in one-hot encoding: {e}")
         raise
 
-if __name__ == "__main__":
-    try:
-        # Load your split data
-        X_train = pd.read_csv('data/processed/split/X_train.csv')
-        X_valid = pd.read_csv('data/processed/split/X_val.csv')
-        X_test = pd.read_csv('data/processed/split/X_test.csv')
-        
+def main():
+    """Fit and save the encoder (and the encoded copies if enabled)"""
+    if load_params('processing').get('materialize_intermediate'):
+        # Load your split data (only what the final features are built from)
+        X_train, _ = load_split('train', columns=input_columns(), stage='onehot')
+        X_valid, _ = load_split('val', columns=input_columns())
+        X_test, _ = load_split('test', columns=input_columns())
+
         # Apply one-hot encoding (now returns encoder)
-        X_train_ohe, X_valid_ohe, X_test_ohe, ohe = apply_onehot_encoding(X_train, X_valid, X_test)
-        
+        X_train_ohe, X_valid_ohe, X_test_ohe, ohe = apply_onehot_encoding(
+            X_train, X_valid, X_test, columns=final_columns())
+
         # Save the encoded data and encoder
         save_ohe_data(X_train_ohe, X_valid_ohe, X_test_ohe, encoder=ohe)
-        
+    else:
+        # Only the fitted encoder is needed, finefeature.py applies it via the preprocessor
+        X_train, _ = load_split('train', columns=['type'], stage='onehot')
+        ohe = TypeOneHotEncoder(column='type').fit(X_train)
+        save_encoder(ohe)
+
+if __name__ == "__main__":
+    try:
+        run_stage('onehot', main)
     except Exception as e:
         print(f"\n❌ Processing failed: {e}")
\ No newline at end of file
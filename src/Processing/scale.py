@@ -1,16 +1,20 @@
-import pandas as pd
-import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from pathlib import Path
 import os
 import joblib
 
-# Define numerical columns
-NUM_COLUMNS = [
-    'amount', 'oldbalance_org', 'newbalance_orig',
-    'oldbalance_dest', 'newbalance_dest',
-    'diff_new_old_balance', 'diff_new_old_destiny'
-]
+from src.config import load_params
+from src.data.schema import report_memory
+from src.data.storage import iter_table, read_table, write_table
+from src.Processing.selection import NUM_COLUMNS, scaled_columns
+from src.Processing.splitting import iter_split, load_split
+from src.stage_cache import run_stage
+
+def save_scaler(scaler, models_dir='parameters'):
+    """Save the fitted scaler"""
+    Path(models_dir).mkdir(parents=True, exist_ok=True)
+    joblib.dump(scaler, f'{models_dir}/minmax_scaler.joblib')
+    print(f"✅ Scaler saved to {models_dir}")
 
 def save_scaled_data(X_train, X_valid, X_test, scaler, output_dir='data/processed/scaling'):
     """Save scaled datasets and scaler"""
@@ -19,40 +23,40 @@ def save_scaled_data(X_train, X_valid, X_test, scaler, output_dir='data/processe
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
         # Save scaled features
-        X_train.to_csv(f'{output_dir}/X_train_scaled.csv', index=False)
-        X_valid.to_csv(f'{output_dir}/X_valid_scaled.csv', index=False)
-        X_test.to_csv(f'{output_dir}/X_test_scaled.csv', index=False)
+        write_table(X_train, f'{output_dir}/X_train_scaled.csv')
+        write_table(X_valid, f'{output_dir}/X_valid_scaled.csv')
+        write_table(X_test, f'{output_dir}/X_test_scaled.csv')
         
         # Save scaler object
-        joblib.dump(scaler, f'parameters/minmax_scaler.joblib')
+        save_scaler(scaler)
         
         print(f"✅ Scaled data and scaler saved to {output_dir}")
     except Exception as e:
         print(f"❌ Error saving scaled data: {e}")
         raise
 
-def scale_numerical_features(X_train, X_valid, X_test):
+def scale_numerical_features(X_train, X_valid, X_test, columns=NUM_COLUMNS):
     """Scale numerical features using MinMaxScaler"""
     try:
         # Initialize scaler
         mm = MinMaxScaler()
         
         # Validate numerical columns exist
-        missing_cols = [col for col in NUM_COLUMNS if col not in X_train.columns]
+        missing_cols = [col for col in columns if col not in X_train.columns]
         if missing_cols:
             raise ValueError(f"Missing numerical columns: {missing_cols}")
         
         print("\nScaling numerical features...")
         
         # Fit on train and transform all sets
-        X_train[NUM_COLUMNS] = mm.fit_transform(X_train[NUM_COLUMNS])
-        X_valid[NUM_COLUMNS] = mm.transform(X_valid[NUM_COLUMNS])
-        X_test[NUM_COLUMNS] = mm.transform(X_test[NUM_COLUMNS])
+        X_train[columns] = mm.fit_transform(X_train[columns])
+        X_valid[columns] = mm.transform(X_valid[columns])
+        X_test[columns] = mm.transform(X_test[columns])
         
         # Print scaling summary
-        print(f"Scaled columns: {NUM_COLUMNS}")
+        print(f"Scaled columns: {columns}")
         print(f"Train set range after scaling:")
-        print(X_train[NUM_COLUMNS].agg(['min', 'max']))
+        print(X_train[columns].agg(['min', 'max']))
         
         return X_train, X_valid, X_test, mm
         
@@ -60,24 +64,86 @@ def scale_numerical_features(X_train, X_valid, X_test):
         print(f"❌ Error in feature scaling: {e}")
         raise
 
-if __name__ == "__main__":
+def fit_scaler_streaming(chunks, columns=NUM_COLUMNS):
+    """Fit the MinMaxScaler in one pass over chunks of the training set
+
+    partial_fit only keeps the running per-column min/max, so the fitted scaler is
+    the same as fitting on the whole set while memory stays at one chunk.
+    """
+    mm = MinMaxScaler()
+    n_rows = 0
+    for chunk in chunks:
+        mm.partial_fit(chunk[columns])
+        n_rows += len(chunk)
+    if n_rows == 0:
+        raise ValueError("❌ No training rows to fit the scaler on")
+    print(f"✔ Scaler fitted on {n_rows} rows")
+    return mm
+
+def transform_streaming(scaler, input_path, output_path, chunksize=100_000):
+    """Scale the scaler's columns of an artifact chunk by chunk, appending each chunk to output_path"""
+    columns = list(scaler.feature_names_in_)
+    for i, chunk in enumerate(iter_table(input_path, chunksize=chunksize)):
+        chunk[columns] = scaler.transform(chunk[columns])
+        write_table(chunk, output_path, append=i > 0)
+
+def scale_streaming(chunksize, columns=NUM_COLUMNS, input_dir='data/processed/ohe',
+                    output_dir='data/processed/scaling'):
+    """Out-of-core version of scale_numerical_features + save_scaled_data"""
     try:
+        print(f"\nScaling numerical features in chunks of {chunksize} rows...")
+        scaler = fit_scaler_streaming(
+            iter_table(f'{input_dir}/X_train_ohe.csv', columns=columns, chunksize=chunksize), columns)
+
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        for split in ['train', 'valid', 'test']:
+            transform_streaming(scaler, f'{input_dir}/X_{split}_ohe.csv',
+                                f'{output_dir}/X_{split}_scaled.csv', chunksize)
+        save_scaler(scaler)
+        print(f"✅ Scaled data and scaler saved to {output_dir}")
+        return scaler
+    except Exception as e:
+        print(f"❌ Error in streaming feature scaling: {e}")
+        raise
+
+def main():
+    """Fit and save the scaler (and the scaled copies if enabled)"""
+    params = load_params('processing')
+    # Rows per chunk for the out-of-core path; null keeps everything in memory
+    chunksize = params.get('chunksize')
+    # Only the numerical columns that are kept as final features are fitted and scaled
+    columns = scaled_columns()
+
+    if params.get('materialize_intermediate') and chunksize:
+        scale_streaming(int(chunksize), columns)
+    elif params.get('materialize_intermediate'):
         # Load your data (adjust paths as needed)
-        X_train = pd.read_csv('data/processed/ohe/X_train_ohe.csv')
-        X_valid = pd.read_csv('data/processed/ohe/X_valid_ohe.csv')
-        X_test = pd.read_csv('data/processed/ohe/X_test_ohe.csv')
-        
+        X_train = read_table('data/processed/ohe/X_train_ohe.csv')
+        X_valid = read_table('data/processed/ohe/X_valid_ohe.csv')
+        X_test = read_table('data/processed/ohe/X_test_ohe.csv')
+
         print("✔ Successfully loaded data for scaling")
-        
-        # Scale numerical features
+        report_memory(X_train, 'scale')
+
+        # Scale numerical features (freshly loaded frames, safe to scale in place)
         X_train_scaled, X_valid_scaled, X_test_scaled, scaler = scale_numerical_features(
-            X_train.copy(), X_valid.copy(), X_test.copy()
+            X_train, X_valid, X_test, columns
         )
-        
+
         # Save scaled data and scaler
         save_scaled_data(X_train_scaled, X_valid_scaled, X_test_scaled, scaler)
+    elif chunksize:
+        # Only the fitted scaler is needed, finefeature.py applies it via the preprocessor
+        save_scaler(fit_scaler_streaming(iter_split('train', columns=columns, chunksize=int(chunksize)), columns))
+    else:
+        # Only the fitted scaler is needed, finefeature.py applies it via the preprocessor
+        X_train, _ = load_split('train', columns=columns, stage='scale')
+        print("✔ Successfully loaded data for scaling")
+        scaler = MinMaxScaler().fit(X_train[columns])
+        save_scaler(scaler)
 
-
-        
+if __name__ == "__main__":
+    try:
+        run_stage('scale', main)
     except Exception as e:
         print(f"\n❌ Scaling failed: {e}")
\ No newline at end of file
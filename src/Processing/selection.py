@@ -0,0 +1,74 @@
+import time
+
+from src.config import load_params
+from src.data.storage import column_sizes, read_table
+from src.features.velocity import VELOCITY_COLUMNS
+
+# Define final selected features
+FINAL_COLUMNS = [
+    'step', 'oldbalance_org',
+    'newbalance_orig', 'newbalance_dest',
+    'diff_new_old_balance', 'diff_new_old_destiny',
+    'type_TRANSFER'
+]
+
+# Define numerical columns
+NUM_COLUMNS = [
+    'amount', 'oldbalance_org', 'newbalance_orig',
+    'oldbalance_dest', 'newbalance_dest',
+    'diff_new_old_balance', 'diff_new_old_destiny'
+]
+
+ONEHOT_PREFIX = 'type_'
+
+# Raw columns kept in the split copies for the cost-sensitive decision threshold (src/models/threshold.py)
+COST_COLUMNS = ['amount']
+
+
+def final_columns():
+    """Selected model inputs, plus the velocity features when finefeature.include_velocity is set"""
+    # Account velocity features (requires feature_engineering.velocity_window)
+    if load_params('finefeature').get('include_velocity'):
+        return FINAL_COLUMNS + VELOCITY_COLUMNS
+    return list(FINAL_COLUMNS)
+
+
+def input_columns(columns=None):
+    """Featured-data columns needed to build the selected features ('type' for the type_* ones)"""
+    columns = final_columns() if columns is None else columns
+    needed = ['type'] if any(col.startswith(ONEHOT_PREFIX) for col in columns) else []
+    return needed + [col for col in columns if not col.startswith(ONEHOT_PREFIX)]
+
+
+def split_columns():
+    """Featured-data columns kept by the split copies: input_columns() plus COST_COLUMNS"""
+    return list(dict.fromkeys(input_columns() + COST_COLUMNS))
+
+
+def scaled_columns(columns=None):
+    """NUM_COLUMNS that survive the selection, the only ones worth fitting a scaler on"""
+    columns = final_columns() if columns is None else columns
+    return [col for col in NUM_COLUMNS if col in columns]
+
+
+def report_pushdown(stage, path, columns, seconds):
+    """Print how much of an artifact a projected read touched and how long it took
+
+    Sizes are on-disk column chunks for Parquet and estimated text bytes for CSV,
+    where the whole file is still scanned but only the projected columns are parsed.
+    With processing.pushdown_baseline the artifact is also read in full to measure
+    the time saved.
+    """
+    sizes = column_sizes(path)
+    read = sum(sizes.get(col, 0) for col in columns)
+    total = sum(sizes.values())
+    saving = 1 - read / total if total else 0
+    message = (f"✔ [{stage}] projection: {len(columns)}/{len(sizes)} columns, "
+               f"{read / 1024**2:.1f} of {total / 1024**2:.1f} MB ({saving:.0%} less I/O), "
+               f"read in {seconds:.2f}s")
+    if load_params('processing').get('pushdown_baseline'):
+        start = time.perf_counter()
+        read_table(path)
+        full = time.perf_counter() - start
+        message += f", {full - seconds:.2f}s saved vs reading all columns ({full:.2f}s)"
+    print(message)
@@ -1,26 +1,236 @@
+import json
+import os
+import time
+
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from pathlib import Path
 
-def save_split_data(X_train, X_val, X_test, y_train, y_val, y_test, output_dir='data/processed/split'):
-    """Save split datasets to files"""
+from src.config import load_params
+from src.data.schema import report_memory
+from src.data.storage import artifact_hash, iter_table, read_table, remove_table, resolve_path, write_table
+from src.Processing.selection import report_pushdown, split_columns
+from src.stage_cache import run_stage
+
+SPLIT_DIR = 'data/processed/split'
+FEATURED_DATA_PATH = 'data/interim/featured_data.csv'
+TARGET = 'is_fraud'
+
+# Columns of the featured data that are not model inputs
+DROP_COLUMNS = ['is_fraud', 'is_flagged_fraud', 'name_orig', 'name_dest',
+                'step_weeks', 'step_days']
+
+# Split names as used in the artifact file names (X_val.csv, val_idx.npy, ...)
+SPLIT_NAMES = ['train', 'val', 'test']
+
+# Same proportions as the two train_test_split calls: 20% test, then 20% of the rest for val
+TEST_FRACTION = 0.2
+VAL_FRACTION = 0.8 * 0.2
+
+# Stratified streaming split: the rows of each class are dealt out in blocks of
+# SPLIT_BLOCK, in input order, and every block holds exactly BLOCK_SPLITS rows per split
+SPLIT_BLOCK = 25
+BLOCK_SPLITS = np.repeat([2, 1, 0], [round(TEST_FRACTION * SPLIT_BLOCK), round(VAL_FRACTION * SPLIT_BLOCK),
+                                     round((1 - TEST_FRACTION - VAL_FRACTION) * SPLIT_BLOCK)])
+
+def _reset_split_dir(output_dir):
+    """Empty the split directory so artifacts of the other split mode never linger"""
+    if Path(output_dir).exists():
+        remove_table(output_dir)
     Path(output_dir).mkdir(parents=True, exist_ok=True)
 
+def save_split_data(X_train, X_val, X_test, y_train, y_val, y_test, output_dir=SPLIT_DIR):
+    """Save split datasets to files"""
+    _reset_split_dir(output_dir)
+
     # Save features
-    X_train.to_csv(f'{output_dir}/X_train.csv', index=False)
-    X_val.to_csv(f'{output_dir}/X_val.csv', index=False)
-    X_test.to_csv(f'{output_dir}/X_test.csv', index=False)
+    write_table(X_train, f'{output_dir}/X_train.csv')
+    write_table(X_val, f'{output_dir}/X_val.csv')
+    write_table(X_test, f'{output_dir}/X_test.csv')
 
     # Save targets
-    y_train.to_csv(f'{output_dir}/y_train.csv', index=False, header=True)
-    y_val.to_csv(f'{output_dir}/y_val.csv', index=False, header=True)
-    y_test.to_csv(f'{output_dir}/y_test.csv', index=False, header=True)
+    write_table(y_train.to_frame(), f'{output_dir}/y_train.csv')
+    write_table(y_val.to_frame(), f'{output_dir}/y_val.csv')
+    write_table(y_test.to_frame(), f'{output_dir}/y_test.csv')
+
+def save_split_indices(train_idx, val_idx, test_idx, output_dir=SPLIT_DIR, df_path=FEATURED_DATA_PATH):
+    """Save the row positions of each split into the featured data as int32 .npy arrays
+
+    The hash of the featured data is saved next to them, so the split directory
+    (the only dependency of the downstream stages) changes whenever the data the
+    indices point into changes.
+    """
+    _reset_split_dir(output_dir)
+    for name, idx in zip(SPLIT_NAMES, [train_idx, val_idx, test_idx]):
+        np.save(f'{output_dir}/{name}_idx.npy', idx.astype(np.int32))
+    with open(f'{output_dir}/source.json', 'w') as f:
+        json.dump({'featured_data': str(resolve_path(df_path)), 'sha256': artifact_hash(df_path)}, f, indent=4)
+
+def stratified_split_indices(y):
+    """Row positions of the train/val/test splits, identical to splitting the frames themselves"""
+    positions = np.arange(len(y), dtype=np.int32)
+    temp_idx, test_idx, y_temp, _ = train_test_split(
+        positions, y, test_size=0.2, stratify=y, random_state=42
+    )
+    train_idx, val_idx = train_test_split(
+        temp_idx, test_size=0.2, stratify=y_temp, random_state=42
+    )
+    return train_idx, val_idx, test_idx
+
+def load_split(name, columns=None, split_dir=SPLIT_DIR, df_path=FEATURED_DATA_PATH, stage=None):
+    """Return (X, y) for one split, from the saved copies or by index into the featured data
+
+    With index-only splitting nothing but the requested columns is read from the
+    featured data, and the rows are gathered straight from those columns. Passing
+    a stage name reports the I/O of the projected read.
+    """
+    start = time.perf_counter()
+    idx_path = Path(split_dir) / f'{name}_idx.npy'
+    if not idx_path.exists():
+        source = f'{split_dir}/X_{name}.csv'
+        X = read_table(source, columns=columns)
+        y = read_table(f'{split_dir}/y_{name}.csv').squeeze(axis=1)
+    else:
+        source = df_path
+        idx = np.load(idx_path)
+        read_columns = None if columns is None else list(columns) + [TARGET]
+        df = read_table(df_path, columns=read_columns)
+        if columns is None:
+            columns = [c for c in df.columns if c not in DROP_COLUMNS]
+        X = df[columns].take(idx).reset_index(drop=True)
+        y = df[TARGET].take(idx).reset_index(drop=True)
+
+    if stage and columns is not None:
+        report_pushdown(stage, source, list(columns), time.perf_counter() - start)
+    return X, y
+
+def iter_split(name, columns=None, chunksize=100_000, split_dir=SPLIT_DIR, df_path=FEATURED_DATA_PATH):
+    """Yield the X rows of one split in chunks without loading the whole split
+
+    Saved copies stream in split order. Index-only splits stream in featured-data
+    order, so use them for order-free passes such as fitting statistics.
+    """
+    idx_path = Path(split_dir) / f'{name}_idx.npy'
+    if not idx_path.exists():
+        yield from iter_table(f'{split_dir}/X_{name}.csv', columns=columns, chunksize=chunksize)
+        return
+
+    idx = np.sort(np.load(idx_path))
+    offset = 0
+    for chunk in iter_table(df_path, columns=columns, chunksize=chunksize):
+        # Rows of this split that fall inside the chunk's position range
+        start, offset = offset, offset + len(chunk)
+        lo, hi = np.searchsorted(idx, [start, offset])
+        if hi > lo:
+            yield chunk.iloc[idx[lo:hi] - start].drop(columns=DROP_COLUMNS, errors='ignore')
+
+def _mix64(x):
+    """splitmix64 finalizer: a well-spread uint64 hash of each uint64 value"""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
 
-def split_and_save_data(df_path='data/interim/featured_data.csv'):
+def assign_splits(y, seen):
+    """Split code per row (0 train, 1 val, 2 test), stratified by class
+
+    The k-th row of each class (counted over the whole stream; `seen` holds the
+    per-class counts of earlier chunks and is updated) takes slot k % SPLIT_BLOCK
+    of block k // SPLIT_BLOCK. The slots of every block are shuffled by a hash of
+    (class, block, slot), so each complete block puts exactly 5 rows in test, 4 in
+    val and 16 in train. The assignment only depends on the rows before it, so
+    re-runs reproduce it and appended rows leave earlier complete blocks unchanged.
+    """
+    codes = np.zeros(len(y), dtype=np.int8)
+    for label in (0, 1):
+        rows = np.flatnonzero(y == label)
+        if not len(rows):
+            continue
+        k = seen[label] + np.arange(len(rows), dtype=np.int64)
+        blocks, slots = np.divmod(k, SPLIT_BLOCK)
+        # Shuffle of every block touched: rank of each slot's hash within its block
+        touched = np.arange(blocks[0], blocks[-1] + 1, dtype=np.uint64)
+        keys = (touched[:, None] * np.uint64(SPLIT_BLOCK) + np.arange(SPLIT_BLOCK, dtype=np.uint64)) * np.uint64(2)
+        ranks = np.argsort(np.argsort(_mix64(keys + np.uint64(label)), axis=1), axis=1)
+        codes[rows] = BLOCK_SPLITS[ranks[blocks - blocks[0], slots]]
+        seen[label] += len(rows)
+    return codes
+
+def split_streaming(df_path=FEATURED_DATA_PATH, chunksize=1_000_000, tolerance=0.25, output_dir=SPLIT_DIR):
+    """Split the featured data in one chunked pass, stratified by class, appending to the split copies
+
+    Memory is bounded by chunksize. The copies are written to a temporary directory
+    that replaces output_dir only once the fraud ratio of every split is within
+    `tolerance` (relative) of the overall ratio; otherwise it is removed and a
+    ValueError is raised.
+    """
+    tmp_dir = Path(f'{output_dir}.tmp')
     try:
-        # 1. Load data
-        df = pd.read_csv(df_path)
+        print(f"\nSplitting by class in chunks of {chunksize} rows...")
+        features = split_columns()
+        read_columns = list(dict.fromkeys(features + [TARGET]))
+        _reset_split_dir(tmp_dir)
+
+        rows = np.zeros(len(SPLIT_NAMES), dtype=np.int64)
+        frauds = np.zeros(len(SPLIT_NAMES), dtype=np.int64)
+        seen = {0: 0, 1: 0}
+        for chunk in iter_table(df_path, columns=read_columns, chunksize=chunksize):
+            if not set(chunk[TARGET].unique()).issubset({0, 1}):
+                raise ValueError("❌ 'is_fraud' column contains non-binary values.")
+
+            codes = assign_splits(chunk[TARGET].to_numpy(), seen)
+            for code, name in enumerate(SPLIT_NAMES):
+                part = chunk[codes == code]
+                if part.empty:
+                    continue
+                write_table(part[features], f'{tmp_dir}/X_{name}.csv', append=rows[code] > 0)
+                write_table(part[[TARGET]], f'{tmp_dir}/y_{name}.csv', append=rows[code] > 0)
+                rows[code] += len(part)
+                frauds[code] += int(part[TARGET].sum())
+
+        if rows.sum() == 0:
+            raise ValueError("❌ No valid data remaining after cleaning.")
+
+        # Stratification check against the overall fraud ratio, before anything replaces the old split
+        overall = frauds.sum() / rows.sum()
+        print("\n✔ Data splitting completed:")
+        for code, name in enumerate(SPLIT_NAMES):
+            ratio = frauds[code] / rows[code] if rows[code] else 0.0
+            print(f"{name.capitalize()} set: {rows[code]} samples ({rows[code]/rows.sum():.1%}), "
+                  f"fraud ratio {ratio:.4f}")
+            if overall and abs(ratio - overall) > tolerance * overall:
+                raise ValueError(f"❌ {name} fraud ratio {ratio:.4f} is outside {tolerance:.0%} "
+                                 f"of the overall {overall:.4f}")
+
+        if Path(output_dir).exists():
+            remove_table(output_dir)
+        os.replace(tmp_dir, output_dir)
+        print(f"\n✅ Data saved to '{output_dir}'")
+
+    except Exception as e:
+        if tmp_dir.exists():
+            remove_table(tmp_dir)
+        print(f"\n❌ Error: {str(e)}")
+        raise
+
+def split_and_save_data(df_path=FEATURED_DATA_PATH, index_only=False, df=None):
+    """Stratified train/val/test split of the featured data (read from df_path unless df is given)
+
+    Returns {split name: (X, y)} when the split copies are written, None for index-only splits.
+    """
+    try:
+        # 1. Load data: the target alone to split by index, else only the columns the
+        #    final features (and the threshold's costs) are built from
+        columns = [TARGET] if index_only else split_columns() + [TARGET]
+        if df is None:
+            start = time.perf_counter()
+            df = read_table(df_path, columns=columns)
+            report_pushdown('splitting', df_path, columns, time.perf_counter() - start)
+        else:
+            df = df[columns]
         print(f"✔ Data loaded successfully. Initial shape: {df.shape}")
+        report_memory(df, 'splitting')
 
         # 2. Check target variable values
         print("\nTarget value distribution:")
@@ -31,13 +241,25 @@ def split_and_save_data(df_path='data/interim/featured_data.csv'):
             raise ValueError("❌ 'is_fraud' column contains non-binary values.")
 
         # 4. Prepare features and target
-        X = df.drop(columns=['is_fraud', 'is_flagged_fraud', 'name_orig', 'name_dest',
-                             'step_weeks', 'step_days'], errors='ignore')
-        y = df['is_fraud']
+        X = df.drop(columns=DROP_COLUMNS, errors='ignore')
+        y = df[TARGET]
 
         if len(X) == 0:
             raise ValueError("❌ No valid data remaining after cleaning.")
 
+        if index_only:
+            # 5. Split row positions only, downstream stages slice the featured data lazily
+            print("\nSplitting row indices...")
+            y_values = y.to_numpy()
+            train_idx, val_idx, test_idx = stratified_split_indices(y_values)
+            print("\n✔ Data splitting completed:")
+            for name, idx in zip(SPLIT_NAMES, [train_idx, val_idx, test_idx]):
+                print(f"{name.capitalize()} set: {len(idx)} samples ({len(idx)/len(y):.1%}), "
+                      f"fraud ratio {y_values[idx].mean():.4f}")
+            save_split_indices(train_idx, val_idx, test_idx, df_path=df_path)
+            print(f"\n✅ Split indices saved to '{SPLIT_DIR}'")
+            return
+
         # 5. Split data
         print("\nSplitting data...")
         X_temp, X_test, y_temp, y_test = train_test_split(
@@ -57,11 +279,21 @@ def split_and_save_data(df_path='data/interim/featured_data.csv'):
 
         # 7. Save data
         save_split_data(X_train, X_val, X_test, y_train, y_val, y_test)
-        print(f"\n✅ Data saved to 'data/processed/split'")
+        print(f"\n✅ Data saved to '{SPLIT_DIR}'")
+        return {'train': (X_train, y_train), 'val': (X_val, y_val), 'test': (X_test, y_test)}
 
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
         raise
 
+def main():
+    """Run the split mode selected in params.yaml"""
+    params = load_params('splitting')
+    if params.get('hash_split'):
+        split_streaming(chunksize=int(params.get('chunksize') or 1_000_000),
+                        tolerance=params.get('stratify_tolerance', 0.25))
+    else:
+        split_and_save_data(index_only=params.get('index_only', False))
+
 if __name__ == "__main__":
-    split_and_save_data()
+    run_stage('splitting', main)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+
+class FraudPreprocessor:
+    """One-hot encoding of `type`, MinMax scaling and final column selection in one step
+
+    Built from the fitted one-hot encoder and MinMaxScaler, it computes only the
+    output columns that were selected: a one-hot column compares the integer codes
+    of `type` (computed once) with its category code, a scaled column reuses the
+    scaler's per-column scale_/min_, anything else passes through. Training
+    (finefeature.py) and serving (Make_app Fraud) load the same saved object,
+    so both run exactly this code.
+    """
+
+    def __init__(self, columns, encoder, scaling):
+        self.columns = list(columns)
+        self.encoder = encoder
+        # output column -> code of the 'type' category it flags
+        self.onehot = {col: code for code, col in enumerate(encoder.onehot_columns) if col in self.columns}
+        # output column -> (scale_, min_) of the fitted MinMaxScaler
+        self.scaling = {col: (np.float64(scale), np.float64(offset))
+                        for col, (scale, offset) in scaling.items()}
+
+    @classmethod
+    def from_fitted(cls, encoder, scaler, columns):
+        """Build the fused transformer from the fitted encoder and scaler artifacts"""
+        scaling = {col: (scale, offset) for col, scale, offset
+                   in zip(scaler.feature_names_in_, scaler.scale_, scaler.min_) if col in columns}
+        return cls(columns, encoder, scaling)
+
+    @property
+    def input_columns(self):
+        """Columns of the featured data needed to compute the selected outputs"""
+        needed = [self.encoder.column] if self.onehot else []
+        needed += [col for col in self.columns if col not in self.onehot]
+        return needed
+
+    def transform(self, df):
+        """Return only the selected columns, encoded and scaled"""
+        out = {}
+        codes = self.encoder.codes(df[self.encoder.column]) if self.onehot else None
+        for col in self.columns:
+            if col in self.onehot:
+                out[col] = (codes == self.onehot[col]).astype(np.int8)
+            elif col in self.scaling:
+                scale, offset = self.scaling[col]
+                # Same float32 arithmetic as MinMaxScaler.transform
+                values = df[col].to_numpy(dtype=np.float32, copy=True)
+                values *= scale
+                values += offset
+                out[col] = values
+            else:
+                out[col] = df[col].to_numpy()
+        return pd.DataFrame(out, index=df.index)
@@ -0,0 +1,17 @@
+import yaml
+from pathlib import Path
+
+PARAMS_PATH = Path('params.yaml')
+
+
+def load_params(section=None, params_path=PARAMS_PATH):
+    """Load pipeline parameters from params.yaml (optionally a single section)"""
+    path = Path(params_path)
+    params = {}
+    if path.exists():
+        with open(path) as f:
+            params = yaml.safe_load(f) or {}
+
+    if section is None:
+        return params
+    return params.get(section) or {}
@@ -0,0 +1,100 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.storage import artifact_hash, read_table, resolve_path
+from src.Processing.splitting import load_split
+
+FEATURE_STORE_DIR = Path('data/processed/feature_store')
+DATA_DIR = Path('data/processed')
+
+# split name -> (final feature set, target)
+SPLITS = {
+    'train': ('finefeatures/X_train_finalfeatures.csv', 'split/y_train.csv'),
+    'valid': ('finefeatures/X_valid_finalfeatures.csv', 'split/y_val.csv'),
+    'test': ('finefeatures/X_test_finalfeatures.csv', 'split/y_test.csv'),
+}
+
+
+def _split_name(split):
+    """Name of the split artifacts, e.g. 'val' for split/y_val.csv"""
+    return Path(SPLITS[split][1]).stem[len('y_'):]
+
+
+def _source_hash(split, data_dir=DATA_DIR):
+    X_path, y_path = SPLITS[split]
+    y_path = Path(data_dir) / y_path
+    if resolve_path(y_path).exists():
+        y_hash = artifact_hash(y_path)
+    else:
+        # Index-only splitting: the target is sliced from the featured data by these rows
+        y_hash = artifact_hash(y_path.with_name(f'{_split_name(split)}_idx.npy'), storage_format='npy')
+    return artifact_hash(Path(data_dir) / X_path) + y_hash
+
+
+def materialize(split, X=None, y=None, data_dir=DATA_DIR, store_dir=FEATURE_STORE_DIR):
+    """Write one split as contiguous float32 X / int8 y .npy files plus a metadata sidecar
+
+    X and y are read from the finefeature/split artifacts unless already in memory.
+    """
+    X_path, y_path = SPLITS[split]
+    if X is None:
+        X = read_table(Path(data_dir) / X_path)
+    if y is None:
+        _, y = load_split(_split_name(split), columns=[], split_dir=Path(data_dir) / 'split')
+
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    X_arr = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+    y_arr = np.ascontiguousarray(np.asarray(y).ravel().astype(np.int8))
+    if len(X_arr) != len(y_arr):
+        raise ValueError(f"❌ {split}: X has {len(X_arr)} rows but y has {len(y_arr)}")
+
+    np.save(store_dir / f'X_{split}.npy', X_arr)
+    np.save(store_dir / f'y_{split}.npy', y_arr)
+
+    meta = {
+        'columns': X.columns.tolist(),
+        'target': getattr(y, 'name', None) or 'is_fraud',
+        'n_rows': int(X_arr.shape[0]),
+        'dtype': str(X_arr.dtype),
+        'source_hash': _source_hash(split, data_dir),
+    }
+    with open(store_dir / f'{split}.json', 'w') as f:
+        json.dump(meta, f, indent=4)
+    return meta
+
+
+def materialize_all(data_dir=DATA_DIR, store_dir=FEATURE_STORE_DIR):
+    """Materialize every split from the finefeature and target artifacts"""
+    for split in SPLITS:
+        meta = materialize(split, data_dir=data_dir, store_dir=store_dir)
+        print(f"✔ Feature store: {split} -> {meta['n_rows']} rows x {len(meta['columns'])} features")
+    print(f"✅ Feature store saved to {store_dir}")
+
+
+def load_features(split, store_dir=FEATURE_STORE_DIR, mmap_mode='r'):
+    """Open a split zero-copy: X is a DataFrame view over the memory-mapped float32 array
+
+    Returns (X, y, meta). Nothing is parsed or copied, so opening is O(1) in the
+    number of rows and several processes share one page-cache copy of the data.
+    """
+    store_dir = Path(store_dir)
+    with open(store_dir / f'{split}.json') as f:
+        meta = json.load(f)
+
+    X_arr = np.load(store_dir / f'X_{split}.npy', mmap_mode=mmap_mode)
+    y_arr = np.load(store_dir / f'y_{split}.npy', mmap_mode=mmap_mode)
+    if X_arr.shape != (meta['n_rows'], len(meta['columns'])) or len(y_arr) != meta['n_rows']:
+        raise ValueError(f"❌ Feature store '{split}' does not match its metadata, re-materialize it")
+
+    X = pd.DataFrame(X_arr, columns=meta['columns'], copy=False)
+    y = pd.Series(y_arr, name=meta['target'], copy=False)
+    return X, y, meta
+
+
+if __name__ == "__main__":
+    materialize_all()
@@ -0,0 +1,78 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Known transaction types, fixed so every chunk/split shares the same categories
+TRANSACTION_TYPES = ['CASH_IN', 'CASH_OUT', 'DEBIT', 'PAYMENT', 'TRANSFER']
+TYPE_DTYPE = pd.CategoricalDtype(TRANSACTION_TYPES)
+
+# Columns as they appear in data/external/fraud_detection.csv
+RAW_DTYPES = {
+    'step': 'int32',
+    'type': TYPE_DTYPE,
+    'amount': 'float32',
+    'nameOrig': 'category',
+    'oldbalanceOrg': 'float32',
+    'newbalanceOrig': 'float32',
+    'nameDest': 'category',
+    'oldbalanceDest': 'float32',
+    'newbalanceDest': 'float32',
+    'isFraud': 'int8',
+    'isFlaggedFraud': 'int8',
+}
+
+# Columns after snake_case renaming, feature engineering and one-hot encoding
+COLUMN_DTYPES = {
+    'step': 'int32',
+    'type': TYPE_DTYPE,
+    'amount': 'float32',
+    'name_orig': 'category',
+    'oldbalance_org': 'float32',
+    'newbalance_orig': 'float32',
+    'name_dest': 'category',
+    'oldbalance_dest': 'float32',
+    'newbalance_dest': 'float32',
+    'is_fraud': 'int8',
+    'is_flagged_fraud': 'int8',
+    'step_days': 'float32',
+    'step_weeks': 'float32',
+    'diff_new_old_balance': 'float32',
+    'diff_new_old_destiny': 'float32',
+    **{f'type_{t}': 'int8' for t in TRANSACTION_TYPES},
+    'orig_tx_count': 'int32',
+    'orig_amount_sum': 'float32',
+    'orig_steps_since_prev': 'int32',
+    'dest_tx_count': 'int32',
+    'dest_amount_sum': 'float32',
+    'dest_steps_since_prev': 'int32',
+    'dest_fan_in': 'int32',
+}
+
+
+def apply_schema(df, dtypes=COLUMN_DTYPES):
+    """Cast the known columns of df to their compact dtypes (in place)"""
+    for col, dtype in dtypes.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def _default_nbytes(s):
+    """Estimate the bytes a column would take with pandas' inferred dtypes"""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # object dtype: one pointer per row plus one Python string per value
+        codes = s.cat.codes.to_numpy()
+        sizes = np.array([sys.getsizeof(c) for c in s.cat.categories], dtype=np.int64) + 8
+        counts = np.bincount(codes[codes >= 0], minlength=len(sizes))
+        return int((sizes * counts).sum())
+    return len(s) * 8
+
+
+def report_memory(df, stage):
+    """Print the memory of df versus the float64/int64/object layout pandas would infer"""
+    compact = df.memory_usage(deep=True, index=False).sum()
+    default = sum(_default_nbytes(df[col]) for col in df.columns)
+    saving = 1 - compact / default if default else 0
+    print(f"✔ [{stage}] memory: {compact / 1024**2:.1f} MB "
+          f"(vs {default / 1024**2:.1f} MB inferred, {saving:.0%} saved)")
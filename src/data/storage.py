@@ -0,0 +1,255 @@
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import load_params
+from src.data.schema import COLUMN_DTYPES, apply_schema
+
+STORAGE_PARAMS = load_params('storage')
+
+# 'csv' keeps the original text artifacts, 'parquet' switches to columnar files
+STORAGE_FORMAT = STORAGE_PARAMS.get('format', 'csv')
+COMPRESSION = STORAGE_PARAMS.get('compression', 'zstd')
+ROW_GROUP_SIZE = STORAGE_PARAMS.get('row_group_size', 100_000)
+STEP_PARTITION_SIZE = STORAGE_PARAMS.get('step_partition_size', 24)
+
+PARTITION_COLUMN = 'step_range'
+
+# Artifacts read / written through this module by the running process, so the stage
+# cache can store outputs a stage wrote without declaring them in dvc.yaml
+ACCESSED = {'read': set(), 'written': set()}
+
+
+def resolve_path(path, storage_format=None):
+    """Map a logical artifact path (e.g. 'X_train.csv') to the configured storage format"""
+    storage_format = storage_format or STORAGE_FORMAT
+    return Path(path).with_suffix(f'.{storage_format}')
+
+
+def _step_partitions(df):
+    """Yield (partition_name, frame) pairs grouping rows by step range"""
+    lower = (df['step'] // STEP_PARTITION_SIZE) * STEP_PARTITION_SIZE
+    for lo, part in df.groupby(lower, sort=True):
+        hi = lo + STEP_PARTITION_SIZE - 1
+        yield f'{PARTITION_COLUMN}={int(lo):06d}-{int(hi):06d}', part
+
+
+def _write_parquet_file(df, file_path):
+    """Write a single Parquet file with compression and bounded row groups"""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(file_path, engine='pyarrow', index=False,
+                  compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+
+
+def _next_part(directory, part=None):
+    """Return the named (or next free) part file in a partition directory"""
+    if part is None:
+        n_parts = len(list(directory.glob('part-*.parquet'))) if directory.exists() else 0
+        part = f'part-{n_parts:05d}'
+    return directory / f'{part}.parquet'
+
+
+def write_table(df, path, partition_on_step=False, append=False, part=None, storage_format=None):
+    """Save a DataFrame as CSV or Parquet, optionally appending to an existing artifact
+
+    With Parquet and partition_on_step=True the artifact is a directory holding one
+    sub-directory per step range, so readers filtering on 'step' skip whole files.
+    Row order is preserved for single-file artifacts, which keeps X and y aligned.
+    Passing a part name writes that part of a directory artifact, which lets
+    several processes write one artifact concurrently; parts are read back in
+    name order.
+    """
+    path = resolve_path(path, storage_format)
+    storage_format = path.suffix.lstrip('.')
+    ACCESSED['written'].add(path.as_posix())
+
+    if storage_format == 'csv':
+        if part is not None:
+            path.mkdir(parents=True, exist_ok=True)
+            df.to_csv(path / f'{part}.csv', index=False)
+            return path
+        if not append and path.is_dir():
+            remove_table(path)
+        elif append and path.is_dir():
+            # Directory of parts written by the parallel mode: add one more part
+            part = f'part-{len(list(path.glob("part-*.csv"))):05d}'
+            df.to_csv(path / f'{part}.csv', index=False)
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_header = not (append and path.exists())
+        df.to_csv(path, mode='a' if append else 'w', header=write_header, index=False)
+        return path
+
+    if storage_format != 'parquet':
+        raise ValueError(f"Unsupported storage format: {storage_format}")
+
+    if partition_on_step:
+        if not append and part is None and path.exists():
+            remove_table(path)
+        for partition, group in _step_partitions(df):
+            _write_parquet_file(group, _next_part(path / partition, part))
+    elif part is not None:
+        _write_parquet_file(df, _next_part(path, part))
+    elif append and path.exists():
+        # Single-file artifacts become a directory of parts once appended to
+        if path.is_file():
+            existing = path.with_name(path.name + '.tmp')
+            path.rename(existing)
+            path.mkdir()
+            existing.rename(path / 'part-00000.parquet')
+        _write_parquet_file(df, _next_part(path))
+    else:
+        if path.is_dir():
+            remove_table(path)
+        _write_parquet_file(df, path)
+    return path
+
+
+def remove_table(path):
+    """Delete a previously written artifact, single file or directory of parts"""
+    path = Path(path)
+    if path.is_file():
+        path.unlink()
+        return
+    for file in sorted(path.rglob('*'), reverse=True):
+        file.unlink() if file.is_file() else file.rmdir()
+    path.rmdir()
+
+
+def _apply_filters(df, filters):
+    """Apply [(column, op, value), ...] filters to an in-memory frame"""
+    ops = {
+        '==': lambda s, v: s == v, '!=': lambda s, v: s != v,
+        '<': lambda s, v: s < v, '<=': lambda s, v: s <= v,
+        '>': lambda s, v: s > v, '>=': lambda s, v: s >= v,
+        'in': lambda s, v: s.isin(v), 'not in': lambda s, v: ~s.isin(v),
+    }
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        mask &= ops[op](df[column], value)
+    return df[mask]
+
+
+def _parquet_dataset(path):
+    """Open a Parquet file or partitioned directory as a pyarrow dataset in write order"""
+    import pyarrow.dataset as ds
+
+    if path.is_file():
+        return ds.dataset(str(path), format='parquet')
+
+    files = sorted(str(f) for f in path.rglob('*.parquet'))
+    return ds.dataset(files, format='parquet', partitioning='hive',
+                      partition_base_dir=str(path))
+
+
+def read_table(path, columns=None, filters=None, storage_format=None):
+    """Load an artifact in compact dtypes, reading only the requested columns and rows
+
+    filters use the pyarrow DNF form, e.g. [('step', '>=', 100), ('step', '<', 200)].
+    For Parquet they are pushed down to partition pruning and row-group statistics.
+    """
+    path = resolve_path(path, storage_format)
+    storage_format = path.suffix.lstrip('.')
+    ACCESSED['read'].add(path.as_posix())
+
+    if storage_format == 'csv':
+        filter_cols = [f[0] for f in filters or []]
+        usecols = None if columns is None else list(dict.fromkeys(list(columns) + filter_cols))
+        if path.is_dir():
+            parts = [pd.read_csv(f, usecols=usecols, dtype=COLUMN_DTYPES)
+                     for f in sorted(path.glob('*.csv'))]
+            df = apply_schema(pd.concat(parts, ignore_index=True))
+        else:
+            df = pd.read_csv(path, usecols=usecols, dtype=COLUMN_DTYPES)
+        if filters:
+            df = _apply_filters(df, filters).reset_index(drop=True)
+        return df if columns is None else df[list(columns)]
+
+    if storage_format != 'parquet':
+        raise ValueError(f"Unsupported storage format: {storage_format}")
+
+    import pyarrow.parquet as pq
+
+    dataset = _parquet_dataset(path)
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c != PARTITION_COLUMN]
+    expression = pq.filters_to_expression(filters) if filters else None
+    table = dataset.to_table(columns=list(columns), filter=expression)
+    return apply_schema(table.to_pandas())
+
+
+def iter_table(path, columns=None, chunksize=100_000, storage_format=None):
+    """Yield an artifact as DataFrames of at most chunksize rows, in write order
+
+    Peak memory is bounded by chunksize rather than the artifact size.
+    """
+    path = resolve_path(path, storage_format)
+    storage_format = path.suffix.lstrip('.')
+    ACCESSED['read'].add(path.as_posix())
+
+    if storage_format == 'csv':
+        files = sorted(path.glob('*.csv')) if path.is_dir() else [path]
+        for file in files:
+            for chunk in pd.read_csv(file, usecols=columns, dtype=COLUMN_DTYPES, chunksize=chunksize):
+                yield chunk if columns is None else chunk[list(columns)]
+        return
+
+    if storage_format != 'parquet':
+        raise ValueError(f"Unsupported storage format: {storage_format}")
+
+    dataset = _parquet_dataset(path)
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c != PARTITION_COLUMN]
+    for batch in dataset.to_batches(columns=list(columns), batch_size=chunksize):
+        if batch.num_rows:
+            yield apply_schema(batch.to_pandas())
+
+
+def column_sizes(path, storage_format=None, sample_rows=1000):
+    """Bytes per column of an artifact: exact compressed sizes for Parquet, estimated for CSV
+
+    The CSV estimate splits the file size by the average text width of each column
+    over the first sample_rows rows.
+    """
+    path = resolve_path(path, storage_format)
+    storage_format = path.suffix.lstrip('.')
+
+    if storage_format == 'csv':
+        files = sorted(path.glob('*.csv')) if path.is_dir() else [path]
+        sample = pd.read_csv(files[0], nrows=sample_rows, dtype=str, keep_default_na=False)
+        # +1 for the delimiter / newline after each value
+        widths = {col: sample[col].str.len().mean() + 1 for col in sample.columns}
+        total_width = sum(widths.values())
+        file_bytes = sum(f.stat().st_size for f in files)
+        return {col: file_bytes * width / total_width for col, width in widths.items()}
+
+    if storage_format != 'parquet':
+        raise ValueError(f"Unsupported storage format: {storage_format}")
+
+    import pyarrow.parquet as pq
+
+    files = sorted(path.rglob('*.parquet')) if path.is_dir() else [path]
+    sizes = {}
+    for file in files:
+        metadata = pq.ParquetFile(file).metadata
+        for rg in range(metadata.num_row_groups):
+            row_group = metadata.row_group(rg)
+            for i in range(row_group.num_columns):
+                chunk = row_group.column(i)
+                sizes[chunk.path_in_schema] = sizes.get(chunk.path_in_schema, 0) + chunk.total_compressed_size
+    return sizes
+
+
+def artifact_hash(path, storage_format=None):
+    """sha256 over the bytes of an artifact (every part file for directory artifacts)"""
+    import hashlib
+
+    path = resolve_path(path, storage_format)
+    files = sorted(f for f in path.rglob('*') if f.is_file()) if path.is_dir() else [path]
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(str(file.relative_to(path) if path.is_dir() else file.name).encode())
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+# Per-account behaviour over the trailing window of steps (s - window, s]
+ORIG_VELOCITY_COLUMNS = ['orig_tx_count', 'orig_amount_sum', 'orig_steps_since_prev']
+DEST_VELOCITY_COLUMNS = ['dest_tx_count', 'dest_amount_sum', 'dest_steps_since_prev', 'dest_fan_in']
+VELOCITY_COLUMNS = ORIG_VELOCITY_COLUMNS + DEST_VELOCITY_COLUMNS
+
+# Columns needed from earlier rows to compute the features of later ones
+HISTORY_COLUMNS = ['step', 'amount', 'name_orig', 'name_dest']
+
+
+def _account_codes(names):
+    """Integer code per account, reusing the categorical codes when available"""
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        return names.cat.codes.to_numpy().astype(np.int64)
+    return pd.factorize(names)[0].astype(np.int64)
+
+
+def _window_sums(group_codes, blocks, values, lo, hi):
+    """Sum of values[lo:hi] per row, added up only from rows inside the window's step blocks
+
+    Rows are cut into (account, block) groups, a block being `window` absolute steps,
+    so a window covers the tail of the previous block and the head of its own. Running
+    sums restart at every group (forwards for the head, backwards for the tail), which
+    makes each sum depend only on rows within `window` steps of it: chunked, parallel
+    and incremental runs, which see only that much history, add up the same numbers
+    in the same order as a single pass.
+    """
+    new_group = np.r_[True, (group_codes[1:] != group_codes[:-1]) | (blocks[1:] != blocks[:-1])]
+    group = np.cumsum(new_group)
+    forward = pd.Series(values).groupby(group).cumsum().to_numpy()
+    backward = pd.Series(values[::-1]).groupby(group[::-1]).cumsum().to_numpy()[::-1]
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(len(values)), 0))
+
+    last = hi - 1
+    start = group_start[last]
+    head = forward[last] - np.where(lo > start, forward[np.maximum(lo - 1, 0)], 0.0)
+    return np.where(lo < start, forward[last] + backward[lo], head)
+
+
+def _account_window_stats(codes, steps, amounts, window, span, first_step=0):
+    """Transaction count, amount sum and steps since previous transaction per account
+
+    One lexsort groups each account's transactions in step order; window bounds are
+    then found with searchsorted on a combined (account, step) key and sums come from
+    running sums over step blocks anchored at absolute step 0 (steps are relative to
+    first_step), so no per-row Python is involved.
+    """
+    order = np.lexsort((steps, codes))
+    s = steps[order]
+    key = codes[order] * span + s
+
+    hi = np.searchsorted(key, key, side='right')
+    lo = np.searchsorted(key, key - window + 1, side='left')
+    sums = _window_sums(codes[order], (s + first_step) // window,
+                        amounts[order].astype(np.float64), lo, hi)
+
+    same_account = np.r_[False, key[1:] // span == key[:-1] // span]
+    gap = np.r_[0, np.diff(s)]
+    since_prev = np.where(same_account & (gap < window), gap, -1)
+
+    count = np.empty_like(hi)
+    total = np.empty(len(s), dtype=np.float64)
+    prev = np.empty_like(since_prev)
+    count[order] = hi - lo
+    total[order] = sums
+    prev[order] = since_prev
+    return count, total, prev
+
+
+def _fan_in(dest_codes, orig_codes, steps, window, span):
+    """Number of distinct origin accounts paying each destination within the window
+
+    Every (destination, origin) pair is active from its first transaction until
+    `window` steps after its last one, with runs split wherever the pair goes quiet
+    for a full window. The distinct count at step t is then the number of runs
+    started minus runs ended by t, read off two sorted key arrays.
+    """
+    order = np.lexsort((steps, orig_codes, dest_codes))
+    d, o, s = dest_codes[order], orig_codes[order], steps[order]
+
+    new_pair = np.r_[True, (d[1:] != d[:-1]) | (o[1:] != o[:-1])]
+    new_run = new_pair | np.r_[True, np.diff(s) >= window]
+    run_starts = np.flatnonzero(new_run)
+    run_ends = np.r_[run_starts[1:] - 1, len(s) - 1]
+
+    start_keys = np.sort(d[run_starts] * span + s[run_starts])
+    end_keys = np.sort(d[run_starts] * span + s[run_ends] + window)
+
+    query = dest_codes * span + steps
+    return (np.searchsorted(start_keys, query, side='right')
+            - np.searchsorted(end_keys, query, side='right'))
+
+
+def add_velocity_features(df, window=24, history=None):
+    """Add per-origin and per-destination velocity features over a window of steps
+
+    history holds earlier transactions (HISTORY_COLUMNS) that count towards the
+    windows of df but are not returned, which lets chunked runs carry over only the
+    last `window` steps and still match a single pass over the full file.
+    """
+    if history is not None and len(history):
+        frame = pd.concat([history[HISTORY_COLUMNS], df[HISTORY_COLUMNS]], ignore_index=True)
+    else:
+        frame = df[HISTORY_COLUMNS]
+    if len(df) == 0:
+        return df.assign(**{col: pd.Series(dtype='float32') for col in VELOCITY_COLUMNS})
+
+    steps = frame['step'].to_numpy().astype(np.int64)
+    first_step = int(steps.min())
+    steps = steps - first_step
+    amounts = frame['amount'].to_numpy()
+    span = int(steps.max()) + window + 1
+
+    orig = _account_codes(frame['name_orig'])
+    dest = _account_codes(frame['name_dest'])
+
+    orig_count, orig_sum, orig_prev = _account_window_stats(orig, steps, amounts, window, span, first_step)
+    dest_count, dest_sum, dest_prev = _account_window_stats(dest, steps, amounts, window, span, first_step)
+    fan_in = _fan_in(dest, orig, steps, window, span)
+
+    # Keep only the rows belonging to df
+    rows = slice(len(frame) - len(df), None)
+    df['orig_tx_count'] = orig_count[rows]
+    df['orig_amount_sum'] = orig_sum[rows]
+    df['orig_steps_since_prev'] = orig_prev[rows]
+    df['dest_tx_count'] = dest_count[rows]
+    df['dest_amount_sum'] = dest_sum[rows]
+    df['dest_steps_since_prev'] = dest_prev[rows]
+    df['dest_fan_in'] = fan_in[rows]
+    return df
@@ -0,0 +1,112 @@
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+from src.config import load_params
+
+KNN_PARAMS = load_params('knn')
+
+
+class KDTreeKNNClassifier(BaseEstimator, ClassifierMixin):
+    """k-nearest-neighbour classifier over a k-d tree built once at fit time
+
+    The tree is pickled with the model, so predictions never rebuild it or scan
+    the training rows. eps trades recall for latency: neighbours are only
+    guaranteed within (1 + eps) times the true k-th distance (0 is exact).
+    Queries run in batches of batch_size rows over n_jobs threads (cKDTree's workers,
+    -1 = all cores), which the trainer pins to the model's thread budget.
+    Uniform weights, as KNeighborsClassifier's default.
+    """
+
+    def __init__(self, n_neighbors=5, eps=0.0, leafsize=40, batch_size=50_000, n_jobs=-1):
+        self.n_neighbors = n_neighbors
+        self.eps = eps
+        self.leafsize = leafsize
+        self.batch_size = batch_size
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y):
+        if hasattr(X, 'columns'):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        X = np.asarray(X, dtype=np.float64)
+        self.classes_, y_codes = np.unique(np.asarray(y).ravel(), return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+        self._y = y_codes.astype(np.int8)
+        # balanced_tree=False builds faster on large inputs at little query cost
+        self.tree_ = cKDTree(X, leafsize=self.leafsize, balanced_tree=False, compact_nodes=True)
+        return self
+
+    def kneighbors(self, X):
+        """(distances, indices) of the n_neighbors nearest training rows, batch by batch"""
+        X = np.asarray(X, dtype=np.float64)
+        distances = np.empty((len(X), self.n_neighbors))
+        indices = np.empty((len(X), self.n_neighbors), dtype=np.intp)
+        for start in range(0, len(X), self.batch_size):
+            stop = start + self.batch_size
+            dist, idx = self.tree_.query(X[start:stop], k=self.n_neighbors, eps=self.eps, workers=self.n_jobs)
+            distances[start:stop] = dist.reshape(-1, self.n_neighbors)
+            indices[start:stop] = idx.reshape(-1, self.n_neighbors)
+        return distances, indices
+
+    def predict_proba(self, X):
+        _, indices = self.kneighbors(X)
+        votes = self._y[indices]
+        return np.stack([(votes == code).mean(axis=1) for code in range(len(self.classes_))], axis=1)
+
+    def predict(self, X):
+        # argmax picks the first class on ties, like KNeighborsClassifier
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def build_knn(**params):
+    """KNN estimator for knn.mode: 'kdtree' (default) or 'brute' (KNeighborsClassifier)"""
+    if KNN_PARAMS.get('mode', 'kdtree') == 'brute':
+        from sklearn.neighbors import KNeighborsClassifier
+        return KNeighborsClassifier(**params)
+    defaults = {key: KNN_PARAMS[key] for key in ('eps', 'leafsize', 'batch_size') if key in KNN_PARAMS}
+    return KDTreeKNNClassifier(**{**defaults, **params})
+
+
+def benchmark(eps_values=(0.0, 0.5, 2.0), n_neighbors=5):
+    """Brute-force KNeighborsClassifier against the k-d tree at several eps values
+
+    Reports fit and predict time on the test split, the fraction of exact
+    neighbours each eps recovers, prediction agreement and AUC-PR.
+    """
+    from sklearn.metrics import average_precision_score
+    from sklearn.neighbors import KNeighborsClassifier
+
+    from src.data.feature_store import load_features
+
+    X_train, y_train, _ = load_features('train')
+    X_test, y_test, _ = load_features('test')
+
+    start = time.perf_counter()
+    brute = KNeighborsClassifier(n_neighbors=n_neighbors, algorithm='brute', n_jobs=-1).fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    brute_proba = brute.predict_proba(X_test)[:, 1]
+    predict_time = time.perf_counter() - start
+    _, exact = brute.kneighbors(X_test)
+    print(f"{'brute (current)':>18}: fit {fit_time:6.2f}s  predict {predict_time:7.2f}s  "
+          f"AUC-PR {average_precision_score(y_test, brute_proba):.4f}")
+
+    for eps in eps_values:
+        start = time.perf_counter()
+        model = KDTreeKNNClassifier(n_neighbors=n_neighbors, eps=eps).fit(X_train, y_train)
+        tree_fit = time.perf_counter() - start
+        start = time.perf_counter()
+        proba = model.predict_proba(X_test)[:, 1]
+        tree_predict = time.perf_counter() - start
+        _, found = model.kneighbors(X_test)
+        recall = np.mean([len(np.intersect1d(a, b)) for a, b in zip(exact, found)]) / n_neighbors
+        agreement = np.mean((proba > 0.5) == (brute_proba > 0.5))
+        print(f"{f'kdtree eps={eps}':>18}: fit {tree_fit:6.2f}s  predict {tree_predict:7.2f}s "
+              f"({predict_time / tree_predict:.1f}x)  neighbour recall {recall:.4f}  "
+              f"agreement {agreement:.4f}  AUC-PR {average_precision_score(y_test, proba):.4f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,112 @@
+import time
+
+import numpy as np
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.svm import SVC, LinearSVC
+from sklearn.utils.class_weight import compute_sample_weight
+
+from src.config import load_params
+
+SVM_PARAMS = load_params('svm')
+
+# 'nystroem': RBF kernel approximated by n_components landmarks feeding a linear SVM,
+# 'linear': linear SVM on the raw features, 'exact': the original kernel SVC
+MODE = SVM_PARAMS.get('mode', 'nystroem')
+N_COMPONENTS = SVM_PARAMS.get('n_components', 300)
+CLASS_WEIGHT = SVM_PARAMS.get('class_weight', 'balanced')
+# The Nystroem features are never materialized for the whole split: the linear SVM
+# (hinge-loss SGD) makes `epochs` passes over chunks of `chunksize` transformed rows
+EPOCHS = SVM_PARAMS.get('epochs', 5)
+CHUNKSIZE = SVM_PARAMS.get('chunksize', 100_000)
+# Training rows of the SVC comparison (SVC does not scale to the full split)
+COMPARE_ROWS = SVM_PARAMS.get('compare_rows', 20_000)
+
+
+def build_svm(mode=MODE, **params):
+    """SVM estimator for svm.mode; params go to the final SVC / LinearSVC / SGDClassifier"""
+    if mode == 'exact':
+        return SVC(**params)
+    if mode == 'linear':
+        return LinearSVC(**{'class_weight': CLASS_WEIGHT, **params})
+    if mode != 'nystroem':
+        raise ValueError(f"❌ Unknown svm.mode '{mode}', expected nystroem, linear or exact")
+    # gamma 'scale' is resolved from the training data in fit_svm, like SVC's default;
+    # class_weight is applied as sample weights, which partial_fit supports
+    return Pipeline([
+        ('nystroem', Nystroem(kernel='rbf', gamma=SVM_PARAMS.get('gamma', 'scale'),
+                              n_components=N_COMPONENTS, random_state=0)),
+        ('svm', SGDClassifier(**{'loss': 'hinge', 'alpha': 1e-4, 'random_state': 0, **params})),
+    ])
+
+
+def _fit_chunked(model, X, y, epochs=EPOCHS, chunksize=CHUNKSIZE):
+    """Fit the Nystroem pipeline one transformed chunk at a time, in bounded memory"""
+    nystroem, svm = model.named_steps['nystroem'], model.named_steps['svm']
+    y = np.asarray(y).ravel()
+    if nystroem.gamma == 'scale':
+        nystroem.set_params(gamma=1.0 / (X.shape[1] * float(np.asarray(X).var(dtype=np.float64))))
+    # Only n_components landmark rows are sampled and kept
+    nystroem.fit(X)
+    rows = X.iloc if hasattr(X, 'iloc') else X
+
+    classes = np.unique(y)
+    weights = compute_sample_weight(CLASS_WEIGHT, y) if CLASS_WEIGHT else np.ones(len(y))
+    starts = np.arange(0, len(X), chunksize)
+    rng = np.random.default_rng(0)
+    for _ in range(epochs):
+        for start in rng.permutation(starts):
+            stop = start + chunksize
+            svm.partial_fit(nystroem.transform(rows[start:stop]), y[start:stop], classes=classes,
+                            sample_weight=weights[start:stop])
+    return model
+
+
+def fit_svm(model, X, y, n_threads=1):
+    """Fit an SVM from build_svm; the Nystroem pipeline trains chunk by chunk
+
+    Training cost is linear in rows and prediction cost depends on n_components,
+    not on the number of support vectors. gamma='scale' is resolved to
+    1 / (n_features * X.var()) as SVC does.
+    """
+    if isinstance(model, Pipeline):
+        return _fit_chunked(model, X, y)
+    return model.fit(X, y)
+
+
+def compare(n_rows=COMPARE_ROWS):
+    """SVC against the scalable modes on a stratified subsample of the training split
+
+    All models train on the same n_rows rows; fit time, test prediction time,
+    AUC-PR (from decision_function), precision and recall are printed.
+    """
+    from sklearn.metrics import average_precision_score, precision_score, recall_score
+    from sklearn.model_selection import train_test_split
+
+    from src.data.feature_store import load_features
+
+    X_train, y_train, _ = load_features('train')
+    X_test, y_test, _ = load_features('test')
+    if n_rows < len(X_train):
+        X_train, _, y_train, _ = train_test_split(X_train, y_train, train_size=n_rows,
+                                                  stratify=y_train, random_state=0)
+    print(f"✔ Comparing on {len(X_train)} training rows, {len(X_test)} test rows")
+
+    for label, model in [('SVC (current)', SVC()), ('SVC balanced', SVC(class_weight='balanced')),
+                         ('nystroem', build_svm('nystroem')), ('linear', build_svm('linear'))]:
+        start = time.perf_counter()
+        fit_svm(model, X_train, y_train)
+        fit_time = time.perf_counter() - start
+        start = time.perf_counter()
+        scores = model.decision_function(X_test)
+        predict_time = time.perf_counter() - start
+        y_pred = (scores > 0).astype(int)
+        print(f"{label:>15}: fit {fit_time:7.2f}s  predict {predict_time:6.2f}s  "
+              f"AUC-PR {average_precision_score(y_test, scores):.4f}  "
+              f"precision {precision_score(y_test, y_pred, zero_division=0):.4f}  "
+              f"recall {recall_score(y_test, y_pred):.4f}")
+
+
+if __name__ == "__main__":
+    compare()
@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.models.engine import TreeEnsemble
+
+# An artifact is a directory: meta.json plus one .npy file per array, opened memory-mapped
+META_FILE = 'meta.json'
+
+ENGINE_ARRAYS = ['feature', 'threshold', 'left', 'right', 'default_left', 'value', 'roots', 'is_leaf']
+
+XGB_ARTIFACT = Path('models/xgb_model.mmap')
+PREPROCESSOR_ARTIFACT = Path('parameters/preprocessor.mmap')
+
+
+def _write(path, meta, arrays=None):
+    """Write to a temporary directory first so readers never see a partial artifact"""
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, array in (arrays or {}).items():
+        np.save(tmp / f'{name}.npy', np.ascontiguousarray(array))
+    (tmp / META_FILE).write_text(json.dumps(meta, indent=4))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return path
+
+
+def save_engine(engine, path):
+    """Save a compiled TreeEnsemble: node arrays as .npy, scalars in meta.json"""
+    meta = {
+        'type': 'tree_ensemble',
+        'depth': engine.depth,
+        'output': engine.output,
+        'base_margin': engine.base_margin,
+        'classes': engine.classes_.tolist(),
+        'feature_names': None if engine.feature_names_in_ is None else list(engine.feature_names_in_),
+        'decision_threshold': engine.decision_threshold_,
+    }
+    return _write(path, meta, {name: getattr(engine, name) for name in ENGINE_ARRAYS})
+
+
+def save_preprocessor(preprocessor, path):
+    """Save a FraudPreprocessor as plain JSON: columns, `type` vocabulary and scaler parameters"""
+    meta = {
+        'type': 'preprocessor',
+        'columns': preprocessor.columns,
+        'encoder': {'column': preprocessor.encoder.column, 'categories': preprocessor.encoder.categories},
+        # repr round-trips the float64 parameters exactly
+        'scaling': {col: [repr(float(scale)), repr(float(offset))]
+                    for col, (scale, offset) in preprocessor.scaling.items()},
+    }
+    return _write(path, meta)
+
+
+def load_artifact(path, mmap_mode='r'):
+    """Open an artifact without unpickling: arrays are memory-mapped read-only
+
+    Every process mapping the same files shares one page-cache copy of them.
+    """
+    path = Path(path)
+    meta = json.loads((path / META_FILE).read_text())
+    if meta['type'] == 'tree_ensemble':
+        arrays = {name: np.load(path / f'{name}.npy', mmap_mode=mmap_mode) for name in ENGINE_ARRAYS}
+        return TreeEnsemble(**arrays, depth=meta['depth'], output=meta['output'],
+                            base_margin=meta['base_margin'], classes=meta['classes'],
+                            feature_names=meta['feature_names'],
+                            decision_threshold=meta.get('decision_threshold'))
+    if meta['type'] == 'preprocessor':
+        from src.Processing.encoder import TypeOneHotEncoder
+        from src.Processing.transformer import FraudPreprocessor
+
+        encoder = TypeOneHotEncoder(**meta['encoder'])
+        scaling = {col: (float(scale), float(offset)) for col, (scale, offset) in meta['scaling'].items()}
+        return FraudPreprocessor(meta['columns'], encoder, scaling)
+    raise ValueError(f"❌ Unknown artifact type '{meta['type']}' in {path}")
+
+
+# ===== Cold start / memory benchmark =====
+
+def _memory_kb():
+    """Rss, Pss (shared pages split between the processes mapping them) and private dirty kB"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0].rstrip(':') in ('Rss', 'Pss', 'Private_Dirty'):
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields
+
+
+def _serve_worker(fmt, row, barrier, results):
+    """Load the model and preprocessor as a scoring process would, score one row, report"""
+    start = time.perf_counter()
+    if fmt == 'joblib':
+        import joblib
+
+        # The path before this change: the pickled XGBClassifier scores the row itself
+        model = joblib.load('models/xgb_model.joblib')
+        preprocessor = joblib.load('parameters/preprocessor.joblib')
+    else:
+        model = load_artifact(XGB_ARTIFACT)
+        preprocessor = load_artifact(PREPROCESSOR_ARTIFACT)
+    model.predict_proba(preprocessor.transform(row))
+    seconds = time.perf_counter() - start
+    # Measure once every worker is loaded, so shared pages are counted as shared
+    barrier.wait()
+    results.put((fmt, seconds, _memory_kb()))
+    barrier.wait()
+
+
+def benchmark(n_workers=4):
+    """Cold start and per-worker memory of n_workers scoring processes, joblib pickles vs mmap artifacts"""
+    import multiprocessing as mp
+
+    from src.data.storage import read_table
+    from src.features.feature_engineering import OUTPUT_PATH
+
+    row = read_table(OUTPUT_PATH).head(1)
+    ctx = mp.get_context('spawn')
+    for fmt in ('joblib', 'mmap'):
+        barrier, results = ctx.Barrier(n_workers), ctx.Queue()
+        workers = [ctx.Process(target=_serve_worker, args=(fmt, row, barrier, results)) for _ in range(n_workers)]
+        for worker in workers:
+            worker.start()
+        stats = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        seconds = np.mean([s[1] for s in stats])
+        memory = {key: np.mean([s[2][key] for s in stats]) / 1024 for key in ('Rss', 'Pss', 'Private_Dirty')}
+        print(f"{fmt:>7}: load + first prediction {seconds:6.3f}s  per worker: RSS {memory['Rss']:6.1f} MB  "
+              f"PSS {memory['Pss']:6.1f} MB  private {memory['Private_Dirty']:6.1f} MB")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,224 @@
+import json
+import time
+
+import numpy as np
+
+# Traversal batch for the vectorized path: memory is batch_size x n_trees node indices
+BATCH_SIZE = 8192
+
+
+class TreeEnsemble:
+    """Compiled binary tree ensemble evaluated with NumPy only
+
+    Every tree lives in the same contiguous arrays: split feature, float32
+    threshold (go left when x < threshold, or when x is NaN and default_left),
+    child indices and leaf value. Leaves point to themselves, so a fixed
+    number of steps walks any row to its leaf without per-node branching.
+    'mean' ensembles (random forests) average the leaf probabilities, 'logit'
+    ensembles (XGBoost) add the leaf values to base_margin and apply a sigmoid.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, depth, output,
+                 base_margin=0.0, classes=(0, 1), feature_names=None, is_leaf=None, decision_threshold=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=np.float32)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.is_leaf = self.left == np.arange(len(self.left)) if is_leaf is None else is_leaf
+        # Forests never route missing values, which saves the NaN test on every step
+        self._routes_missing = bool(self.default_left.any())
+        self.depth = int(depth)
+        self.output = output
+        self.base_margin = float(base_margin)
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = None if feature_names is None else np.asarray(feature_names, dtype=object)
+        # Probability cutoff chosen at training time (src/models/threshold.py), None for predict's 0.5
+        self.decision_threshold_ = decision_threshold
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _as_array(self, X):
+        if hasattr(X, 'columns'):
+            names = self.feature_names_in_
+            if names is not None and (len(X.columns) != len(names) or (X.columns != names).any()):
+                X = X[list(names)]
+            X = X.to_numpy(dtype=np.float32)
+        X = np.asarray(X, dtype=np.float32)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def _step(self, nodes, x):
+        go_left = x < self.threshold[nodes]
+        if self._routes_missing:
+            go_left |= np.isnan(x) & self.default_left[nodes]
+        return np.where(go_left, self.left[nodes], self.right[nodes])
+
+    def _leaf_sum_one(self, row):
+        """Fast path for one row: all trees step together without masking until all reach a leaf"""
+        nodes = self.roots
+        for level in range(self.depth):
+            # Leaves loop on themselves, so stopping early is only a shortcut for deep forests
+            if level % 8 == 7 and self.is_leaf[nodes].all():
+                break
+            nodes = self._step(nodes, row[self.feature[nodes]])
+        return self.value[nodes].sum(dtype=np.float64)
+
+    def _leaf_sums(self, X):
+        sums = np.empty(len(X))
+        for start in range(0, len(X), BATCH_SIZE):
+            batch = X[start:start + BATCH_SIZE]
+            # (row, tree) pairs flattened row-major; only pairs not yet at a leaf move
+            nodes = np.tile(self.roots, len(batch))
+            active = np.flatnonzero(~self.is_leaf[nodes])
+            while len(active):
+                current = nodes[active]
+                nodes[active] = self._step(current, batch[active // self.n_trees, self.feature[current]])
+                active = active[~self.is_leaf[nodes[active]]]
+            sums[start:start + len(batch)] = self.value[nodes].reshape(len(batch), self.n_trees).sum(
+                axis=1, dtype=np.float64)
+        return sums
+
+    def positive_proba(self, X):
+        X = self._as_array(X)
+        sums = np.array([self._leaf_sum_one(X[0])]) if len(X) == 1 else self._leaf_sums(X)
+        if self.output == 'mean':
+            return sums / self.n_trees
+        return 1.0 / (1.0 + np.exp(-(sums + self.base_margin)))
+
+    def predict_proba(self, X):
+        positive = self.positive_proba(X)
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        # Class 1 only when strictly more likely, as argmax over [p0, p1] does
+        return self.classes_[(self.positive_proba(X) > 0.5).astype(int)]
+
+
+def _tree_depth(left, right, root):
+    depth, frontier = 0, np.array([root])
+    while True:
+        frontier = frontier[left[frontier] != frontier]
+        if not len(frontier):
+            return depth
+        frontier = np.concatenate([left[frontier], right[frontier]])
+        depth += 1
+
+
+def _assemble(trees, output, **kwargs):
+    """Concatenate per-tree (feature, threshold, left, right, default_left, value) with leaves self-looped"""
+    columns = [[] for _ in range(6)]
+    roots, depth, offset = [], 0, 0
+    for feature, threshold, left, right, default_left, value in trees:
+        n = len(feature)
+        leaf = left < 0
+        index = np.arange(n) + offset
+        left = np.where(leaf, index, left + offset)
+        right = np.where(leaf, index, right + offset)
+        for column, array in zip(columns, (np.where(leaf, 0, feature), np.where(leaf, 0, threshold),
+                                           left, right, default_left, np.where(leaf, value, 0))):
+            column.append(array)
+        roots.append(offset)
+        depth = max(depth, _tree_depth(left - offset, right - offset, 0))
+        offset += n
+    return TreeEnsemble(*(np.concatenate(column) for column in columns), roots=roots, depth=depth,
+                        output=output, **kwargs)
+
+
+def _compile_forest(forest):
+    """sklearn forest or CompactForest: x <= t becomes x < the next float32 above t"""
+    from src.models.rf.forest import CompactForest
+
+    if not isinstance(forest, CompactForest):
+        forest = CompactForest.from_forest(forest)
+    bounds = list(forest.roots_) + [len(forest.feature_)]
+    trees = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        left, right = forest.left_[start:stop], forest.right_[start:stop]
+        trees.append((forest.feature_[start:stop],
+                      np.nextafter(forest.threshold_[start:stop], np.float32(np.inf)),
+                      np.where(left < 0, -1, left - start), np.where(right < 0, -1, right - start),
+                      np.zeros(stop - start, dtype=bool), forest.value_[start:stop]))
+    return _assemble(trees, 'mean', classes=forest.classes_,
+                     feature_names=getattr(forest, 'feature_names_in_', None))
+
+
+def _compile_xgb(model):
+    """XGBClassifier (binary:logistic) from its JSON model: leaf values sit in split_conditions"""
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw('json'))['learner']
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f"❌ Only binary:logistic boosters can be compiled, got {objective}")
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+    trees = []
+    for tree in learner['gradient_booster']['model']['trees']:
+        left = np.asarray(tree['left_children'])
+        values = np.asarray(tree['split_conditions'], dtype=np.float32)
+        trees.append((np.asarray(tree['split_indices']), values, left, np.asarray(tree['right_children']),
+                      np.asarray(tree['default_left'], dtype=bool), values))
+    return _assemble(trees, 'logit', base_margin=np.log(base_score / (1 - base_score)),
+                     classes=getattr(model, 'classes_', (0, 1)), feature_names=booster.feature_names)
+
+
+def compile_model(model):
+    """Flatten a trained xgb or rf model into a TreeEnsemble; other models are returned as is"""
+    from sklearn.ensemble import RandomForestClassifier
+    from xgboost import XGBClassifier
+
+    from src.models.rf.forest import CompactForest
+
+    if isinstance(model, XGBClassifier):
+        engine = _compile_xgb(model)
+    elif isinstance(model, (RandomForestClassifier, CompactForest)):
+        engine = _compile_forest(model)
+    else:
+        return model
+    engine.decision_threshold_ = getattr(model, 'decision_threshold_', None)
+    return engine
+
+
+def benchmark(names=('xgb', 'rf'), n_single=200):
+    """Library predict_proba against the compiled engine: batch on the test split and one row at a time"""
+    import joblib
+
+    from src.data.feature_store import load_features
+    from src.models.train import model_path
+
+    X_test, _, _ = load_features('test')
+    for name in names:
+        model = joblib.load(model_path(name))
+        start = time.perf_counter()
+        engine = compile_model(model)
+        compile_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = model.predict_proba(X_test)[:, 1]
+        library_batch = time.perf_counter() - start
+        start = time.perf_counter()
+        proba = engine.predict_proba(X_test)[:, 1]
+        engine_batch = time.perf_counter() - start
+
+        rows = [X_test.iloc[[i]] for i in range(min(n_single, len(X_test)))]
+        start = time.perf_counter()
+        for row in rows:
+            model.predict_proba(row)
+        library_row = (time.perf_counter() - start) / len(rows)
+        start = time.perf_counter()
+        for row in rows:
+            engine.predict_proba(row)
+        engine_row = (time.perf_counter() - start) / len(rows)
+
+        print(f"✔ {name}: {engine.n_trees} trees, depth {engine.depth}, compiled in {compile_time:.3f}s, "
+              f"max |proba difference| {np.abs(proba - expected).max():.2e}")
+        print(f"{'batch':>10}: library {library_batch:7.3f}s  engine {engine_batch:7.3f}s "
+              f"({library_batch / engine_batch:.1f}x)")
+        print(f"{'one row':>10}: library {library_row * 1e6:7.0f}µs  engine {engine_row * 1e6:7.0f}µs "
+              f"({library_row / engine_row:.1f}x)")
+
+
+if __name__ == "__main__":
+    benchmark()
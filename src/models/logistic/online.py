@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.config import load_params
+
+LOGISTIC_PARAMS = load_params('logistic')
+
+# 'online': SGD logistic regression trained chunk by chunk with partial_fit,
+# 'batch': the original LogisticRegression on the whole split
+MODE = LOGISTIC_PARAMS.get('mode', 'online')
+CHUNKSIZE = LOGISTIC_PARAMS.get('chunksize', 100_000)
+EPOCHS = LOGISTIC_PARAMS.get('epochs', 5)
+# Continue from the saved model with the rows past its step watermark only
+RESUME = LOGISTIC_PARAMS.get('resume', False)
+
+STEP_COLUMN = 'step'
+
+
+def build_logistic(mode=MODE, **params):
+    """Logistic regression for logistic.mode; params go to SGDClassifier / LogisticRegression"""
+    if mode == 'batch':
+        return LogisticRegression(**params)
+    if mode != 'online':
+        raise ValueError(f"❌ Unknown logistic.mode '{mode}', expected online or batch")
+    # 'step' is not min-max scaled upstream, so features are standardized for SGD
+    return Pipeline([
+        ('scale', StandardScaler()),
+        ('sgd', SGDClassifier(**{'loss': 'log_loss', 'alpha': 1e-4, 'random_state': 0, **params})),
+    ])
+
+
+def _chunks(X, y, chunksize, watermark=None):
+    """(X, y) chunks sliced from the (memory-mapped) split, optionally only rows past watermark"""
+    rows = X.iloc if hasattr(X, 'iloc') else X
+    for start in range(0, len(X), chunksize):
+        X_chunk, y_chunk = rows[start:start + chunksize], y[start:start + chunksize]
+        if watermark is not None:
+            new = np.asarray(X_chunk[STEP_COLUMN]) > watermark
+            X_chunk, y_chunk = X_chunk[new], y_chunk[new]
+        if len(y_chunk):
+            yield X_chunk, y_chunk
+
+
+def fit_online(model, X, y, n_threads=1, path=None, chunksize=CHUNKSIZE, epochs=EPOCHS, resume=RESUME):
+    """Train the online logistic regression over chunks, in memory independent of the row count
+
+    A first pass fits the scaler and counts the classes; `epochs` passes of
+    partial_fit follow, weighting each class by n_rows / (2 * its count) as
+    class_weight='balanced' would. With resume and a saved online model at `path`,
+    only rows whose step is past the saved watermark are learned, with the scaler
+    kept as is and the class counts accumulated. The watermark and class counts
+    are stored on the model.
+    """
+    if not isinstance(model, Pipeline):
+        return model.fit(X, y)
+    if path is None:
+        from src.models.train import model_path
+        path = model_path('logistic')
+
+    y = np.asarray(y).ravel()
+    watermark = None
+    saved = joblib.load(path) if resume and Path(path).exists() else None
+    if isinstance(saved, Pipeline) and hasattr(saved, 'step_watermark_'):
+        model, watermark = saved, saved.step_watermark_
+    scaler, sgd = model.named_steps['scale'], model.named_steps['sgd']
+
+    # 1. Class counts (and the scaler, on a fresh model) in one pass
+    counts = np.zeros(2, dtype=np.int64)
+    last_step = watermark if watermark is not None else -np.inf
+    for X_chunk, y_chunk in _chunks(X, y, chunksize, watermark):
+        counts += np.bincount(y_chunk, minlength=2)
+        last_step = max(last_step, float(np.max(X_chunk[STEP_COLUMN])))
+        if watermark is None:
+            scaler.partial_fit(X_chunk)
+    if not counts.sum():
+        print(f"✔ logistic: no rows past step {watermark}, model unchanged")
+        return model
+    if watermark is not None:
+        counts += model.class_counts_
+
+    # 2. Weighted partial_fit passes
+    class_weights = counts.sum() / (2 * np.maximum(counts, 1))
+    for _ in range(epochs):
+        for X_chunk, y_chunk in _chunks(X, y, chunksize, watermark):
+            sgd.partial_fit(scaler.transform(X_chunk), y_chunk, classes=np.array([0, 1]),
+                            sample_weight=class_weights[y_chunk])
+
+    model.step_watermark_ = last_step
+    model.class_counts_ = counts
+    print(f"✔ logistic: learned {'rows past step ' + str(watermark) if watermark is not None else 'all rows'}"
+          f", watermark now step {last_step:g}")
+    return model
@@ -0,0 +1,198 @@
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import RandomForestClassifier
+
+from src.config import load_params
+
+RF_PARAMS = load_params('rf')
+
+# Save the forest as flat node arrays instead of the sklearn estimator
+COMPACT = RF_PARAMS.get('compact', True)
+COMPRESS = RF_PARAMS.get('compress', 3)
+# Add trees to the saved forest instead of retraining it
+WARM_START = RF_PARAMS.get('warm_start', False)
+ADD_TREES = RF_PARAMS.get('add_trees', 20)
+# Rows per traversal batch: memory is batch_size x n_trees node indices
+BATCH_SIZE = RF_PARAMS.get('batch_size', 8192)
+
+LEAF = -1
+
+
+def _float32_floor(values):
+    """Largest float32 <= each value, so float32 x <= t keeps sklearn's float64 comparison"""
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+class CompactForest(BaseEstimator, ClassifierMixin):
+    """Binary random forest stored as contiguous node arrays
+
+    Per node only the split feature (int16, -1 for leaves), the float32 threshold,
+    the int32 child indices (global across trees) and the float32 positive-class
+    probability are kept; sklearn's impurity, sample counts and per-class values
+    are dropped. Predictions average the trees' leaf probabilities as sklearn does.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_forest(cls, forest, batch_size=BATCH_SIZE):
+        compact = cls(batch_size)
+        compact.classes_ = forest.classes_
+        compact.n_features_in_ = forest.n_features_in_
+        if hasattr(forest, 'feature_names_in_'):
+            compact.feature_names_in_ = forest.feature_names_in_
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            leaf = tree.children_left == LEAF
+            value = tree.value[:, 0, :]
+            roots.append(offset)
+            features.append(np.where(leaf, LEAF, tree.feature).astype(np.int16))
+            thresholds.append(_float32_floor(np.where(leaf, 0.0, tree.threshold)))
+            lefts.append(np.where(leaf, LEAF, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(leaf, LEAF, tree.children_right + offset).astype(np.int32))
+            values.append((value[:, 1] / value.sum(axis=1)).astype(np.float32))
+            offset += tree.node_count
+        compact.feature_ = np.concatenate(features)
+        compact.threshold_ = np.concatenate(thresholds)
+        compact.left_ = np.concatenate(lefts)
+        compact.right_ = np.concatenate(rights)
+        compact.value_ = np.concatenate(values)
+        compact.roots_ = np.asarray(roots, dtype=np.int32)
+        return compact
+
+    @property
+    def n_trees(self):
+        return len(self.roots_)
+
+    def extend(self, other):
+        """Append another CompactForest's trees (warm start); returns self"""
+        if other.n_features_in_ != self.n_features_in_:
+            raise ValueError(f"❌ Cannot merge forests over {self.n_features_in_} and {other.n_features_in_} features")
+        offset = len(self.feature_)
+        shift = lambda children: np.where(children == LEAF, LEAF, children + offset).astype(np.int32)
+        self.feature_ = np.concatenate([self.feature_, other.feature_])
+        self.threshold_ = np.concatenate([self.threshold_, other.threshold_])
+        self.left_ = np.concatenate([self.left_, shift(other.left_)])
+        self.right_ = np.concatenate([self.right_, shift(other.right_)])
+        self.value_ = np.concatenate([self.value_, other.value_])
+        self.roots_ = np.concatenate([self.roots_, other.roots_ + offset]).astype(np.int32)
+        return self
+
+    def _positive_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        proba = np.empty(len(X))
+        for start in range(0, len(X), self.batch_size):
+            batch = X[start:start + self.batch_size]
+            # One node per (row, tree) pair, flattened row-major; each pass moves the
+            # pairs not yet at a leaf one level down, so finished pairs cost nothing
+            nodes = np.tile(self.roots_, len(batch))
+            active = np.flatnonzero(self.feature_[nodes] != LEAF)
+            while len(active):
+                current = nodes[active]
+                go_left = batch[active // self.n_trees, self.feature_[current]] <= self.threshold_[current]
+                nodes[active] = np.where(go_left, self.left_[current], self.right_[current])
+                active = active[self.feature_[nodes[active]] != LEAF]
+            leaves = self.value_[nodes].reshape(len(batch), self.n_trees)
+            proba[start:start + len(batch)] = leaves.mean(axis=1, dtype=np.float64)
+        return proba
+
+    def predict_proba(self, X):
+        positive = self._positive_proba(X)
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def build_rf(**params):
+    """RandomForestClassifier with the rf.tree params (e.g. max_depth, min_samples_leaf) applied"""
+    return RandomForestClassifier(**{**(RF_PARAMS.get('tree') or {}), **params})
+
+
+def fit_rf(model, X, y, n_threads=1, path=None):
+    """Fit the forest on all its cores; compact it, optionally adding to the saved forest
+
+    With rf.warm_start and a compact forest already at `path`, only rf.add_trees new
+    trees are trained (on the data given, e.g. newly arrived rows) and appended.
+    Warm start needs rf.compact and a compact saved forest; anything else raises
+    rather than retraining and overwriting the saved model.
+    """
+    if path is None:
+        from src.models.train import model_path
+        path = model_path('rf')
+
+    existing = joblib.load(path) if WARM_START and Path(path).exists() else None
+    if WARM_START and not COMPACT:
+        raise ValueError("❌ rf.warm_start appends to a compact forest, set rf.compact: true")
+    if existing is not None and not isinstance(existing, CompactForest):
+        raise ValueError(f"❌ rf.warm_start: {path} is not a compact forest, retrain it once "
+                         f"with rf.warm_start: false")
+    if WARM_START and existing is None:
+        print(f"✔ rf: no saved forest at {path}, training the full forest")
+    if isinstance(existing, CompactForest):
+        model.set_params(n_estimators=ADD_TREES)
+    model.fit(X, y)
+    if not COMPACT:
+        return model
+
+    compact = CompactForest.from_forest(model)
+    if isinstance(existing, CompactForest):
+        compact = existing.extend(compact)
+        print(f"✔ rf: {ADD_TREES} trees added, {compact.n_trees} in the forest")
+    return compact
+
+
+def save_rf(model, path):
+    """joblib dump, compressed for the compact format"""
+    joblib.dump(model, path, compress=COMPRESS if isinstance(model, CompactForest) else 0)
+
+
+def _model_bytes(model):
+    """Bytes of node data the model holds in memory"""
+    if isinstance(model, CompactForest):
+        return sum(getattr(model, name).nbytes for name in ('feature_', 'threshold_', 'left_', 'right_',
+                                                             'value_', 'roots_'))
+    return sum(e.tree_.__getstate__()['nodes'].nbytes + e.tree_.value.nbytes for e in model.estimators_)
+
+
+def benchmark(path=None):
+    """Size on disk and in memory, load and predict time of the sklearn forest against the compact one"""
+    from src.data.feature_store import load_features
+    from src.models.train import build_model
+
+    X_train, y_train, _ = load_features('train')
+    X_test, _, _ = load_features('test')
+    forest = build_model('rf', n_threads=-1).fit(X_train, y_train)
+    compact = CompactForest.from_forest(forest)
+
+    expected = forest.predict_proba(X_test)
+    print(f"✔ Max |proba difference|: {np.abs(compact.predict_proba(X_test) - expected).max():.2e}, "
+          f"labels equal: {np.array_equal(compact.predict(X_test), forest.predict(X_test))}")
+
+    for label, model, compress in [('sklearn (current)', forest, 0), ('compact', compact, COMPRESS)]:
+        file = Path(path or 'models') / f'rf_benchmark_{label.split()[0]}.joblib'
+        joblib.dump(model, file, compress=compress)
+        start = time.perf_counter()
+        joblib.load(file)
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        model.predict_proba(X_test)
+        predict_time = time.perf_counter() - start
+        print(f"{label:>18}: {file.stat().st_size / 1024**2:7.1f} MB on disk  "
+              f"{_model_bytes(model) / 1024**2:7.1f} MB in memory  load {load_time:5.2f}s  "
+              f"predict {predict_time:5.2f}s")
+        file.unlink()
+
+
+if __name__ == "__main__":
+    benchmark()
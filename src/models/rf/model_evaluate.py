@@ -10,6 +10,9 @@ from datetime import datetime
 from dvclive import Live 
 import pickle
 
+from src.data.feature_store import load_features
+from src.models.threshold import predict_labels
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,7 +37,8 @@ def load_model(model_path: Path):
 def evaluate_model(model, X_test: pd.DataFrame, y_test: pd.Series):
     """Evaluate model performance and return metrics"""
     try:
-        y_pred = model.predict(X_test)
+        # Decision threshold chosen on the validation split at training time
+        y_pred = predict_labels(model, X_test)
         y_pred_proba = model.predict_proba(X_test)[:, 1] if hasattr(model, 'predict_proba') else None
         
         # Generate classification report
@@ -43,6 +47,7 @@ def evaluate_model(model, X_test: pd.DataFrame, y_test: pd.Series):
         metrics = {
             "timestamp": datetime.now().isoformat(),
             "model": str(model.__class__),
+            "decision_threshold": getattr(model, 'decision_threshold_', None),
             "accuracy": accuracy_score(y_test, y_pred),
             "precision": precision_score(y_test, y_pred, zero_division=0),
             "recall": recall_score(y_test, y_pred, zero_division=0),
@@ -77,8 +82,7 @@ def main():
     model = load_model(MODEL_PATH)
     
     # Load test data
-    X_test = pd.read_csv(DATA_DIR / 'finefeatures/X_test_finalfeatures.csv')
-    y_test = pd.read_csv(DATA_DIR / 'split/y_test.csv').squeeze()  # Convert to Series
+    X_test, y_test, _ = load_features('test')
     
     # Evaluate model
     metrics, clf_report = evaluate_model(model, X_test, y_test)
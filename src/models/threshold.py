@@ -0,0 +1,133 @@
+import time
+
+import numpy as np
+
+from src.config import load_params
+
+THRESHOLD_PARAMS = load_params('threshold')
+
+# Decision threshold chosen on the validation split when a model is trained:
+# 'cost': lowest monetary cost, 'f1': highest F1, 'default': none (model.predict, i.e. 0.5)
+OBJECTIVE = THRESHOLD_PARAMS.get('objective', 'cost')
+# Cost of investigating one alert; a missed fraud costs its transaction amount
+INVESTIGATION_COST = THRESHOLD_PARAMS.get('investigation_cost', 50.0)
+
+CURVE_KEYS = ['threshold', 'alerts', 'precision', 'recall', 'f1', 'cost']
+
+
+def threshold_curve(y, scores, amounts=None, investigation_cost=INVESTIGATION_COST):
+    """Precision, recall, F1 and cost at every distinct score, from one sort
+
+    Rows are alerted when score >= threshold. Sorted by descending score, the
+    alerts at each candidate are a prefix, so true positives and caught fraud
+    amounts are cumulative sums: O(n log n) overall. The cost of a threshold
+    is investigation_cost per alert plus the amount of every missed fraud
+    (1 per fraud without amounts). The first candidate alerts nothing.
+    """
+    y = np.asarray(y).ravel().astype(bool)
+    scores = np.asarray(scores, dtype=np.float64).ravel()
+    amounts = np.ones(len(y)) if amounts is None else np.asarray(amounts, dtype=np.float64).ravel()
+
+    # 1. One descending sort; tied scores are alerted together, so only the last of a run is a cut
+    order = np.argsort(-scores, kind='stable')
+    sorted_scores, fraud = scores[order], y[order]
+    cuts = np.flatnonzero(np.append(sorted_scores[1:] != sorted_scores[:-1], True))
+
+    # 2. Counts and caught amounts at every cut, after the no-alert candidate
+    tp = np.append(0, np.cumsum(fraud)[cuts])
+    alerts = np.append(0, cuts + 1)
+    caught = np.append(0.0, np.cumsum(np.where(fraud, amounts[order], 0.0))[cuts])
+    thresholds = np.append(np.nextafter(sorted_scores[0], np.inf), sorted_scores[cuts])
+
+    # 3. Metrics; F1 = 2 TP / (alerts + frauds)
+    n_fraud = int(fraud.sum())
+    precision = np.divide(tp, alerts, out=np.zeros(len(tp)), where=alerts > 0)
+    recall = tp / max(n_fraud, 1)
+    f1 = np.divide(2 * tp, alerts + n_fraud, out=np.zeros(len(tp)), where=(alerts + n_fraud) > 0)
+    cost = investigation_cost * alerts + (caught[-1] - caught)
+    return dict(zip(CURVE_KEYS, (thresholds, alerts, precision, recall, f1, cost)))
+
+
+def optimize_threshold(y, scores, amounts=None, objective=OBJECTIVE, investigation_cost=INVESTIGATION_COST):
+    """Best point of threshold_curve for the objective: {threshold, alerts, precision, recall, f1, cost}"""
+    curve = threshold_curve(y, scores, amounts, investigation_cost)
+    if objective == 'cost':
+        best = np.argmin(curve['cost'])
+    elif objective == 'f1':
+        best = np.argmax(curve['f1'])
+    else:
+        raise ValueError(f"❌ Unknown threshold.objective '{objective}', expected cost, f1 or default")
+    return {key: float(values[best]) for key, values in curve.items()}
+
+
+def model_scores(model, X):
+    """Fraud scores: positive-class probability, or the decision function for models without one"""
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)[:, 1]
+    return model.decision_function(X)
+
+
+def predict_labels(model, X):
+    """Labels at the model's stored decision_threshold_, or model.predict when it has none"""
+    threshold = getattr(model, 'decision_threshold_', None)
+    if threshold is None:
+        return model.predict(X)
+    return (model_scores(model, X) >= threshold).astype(int)
+
+
+def validation_amounts():
+    """Raw transaction amounts of the validation split, row-aligned with the feature store"""
+    from src.Processing.splitting import load_split
+
+    X_valid, _ = load_split('val', columns=['amount'])
+    return X_valid['amount'].to_numpy(dtype=np.float64)
+
+
+def fit_threshold(model, name, objective=OBJECTIVE):
+    """Set model.decision_threshold_ from the validation split; 'default' leaves the model as is"""
+    if objective == 'default':
+        return model
+    from src.data.feature_store import load_features
+
+    X_valid, y_valid, _ = load_features('valid')
+    amounts = validation_amounts() if objective == 'cost' else None
+    best = optimize_threshold(y_valid, model_scores(model, X_valid), amounts, objective)
+    model.decision_threshold_ = best['threshold']
+    print(f"✔ {name}: decision threshold {best['threshold']:.4g} ({objective}) on valid: "
+          f"{best['alerts']:.0f} alerts, precision {best['precision']:.4f}, recall {best['recall']:.4f}, "
+          f"F1 {best['f1']:.4f}, cost {best['cost']:,.0f}")
+    return model
+
+
+def report(names=('xgb',)):
+    """0.5 cutoff against the chosen thresholds on the test split, with the curve's timing"""
+    import joblib
+
+    from src.data.feature_store import load_features
+    from src.Processing.splitting import load_split
+    from src.models.train import model_path
+
+    X_test, y_test, _ = load_features('test')
+    amounts = load_split('test', columns=['amount'])[0]['amount'].to_numpy(dtype=np.float64)
+    for name in names:
+        model = joblib.load(model_path(name))
+        scores = model_scores(model, X_test)
+        start = time.perf_counter()
+        curve = threshold_curve(y_test, scores, amounts)
+        seconds = time.perf_counter() - start
+        print(f"✔ {name}: {len(curve['threshold'])} candidate thresholds over {len(scores)} rows "
+              f"in {seconds:.3f}s")
+        default = 0.5 if hasattr(model, 'predict_proba') else 0.0
+        chosen = getattr(model, 'decision_threshold_', None)
+        for label, threshold in [('default', default), ('chosen', chosen)]:
+            if threshold is None:
+                continue
+            # The lowest candidate >= threshold alerts exactly the rows scoring >= threshold
+            point = max(np.searchsorted(-curve['threshold'], -threshold, side='right') - 1, 0)
+            print(f"{label:>10} {threshold:8.4g}: alerts {curve['alerts'][point]:7.0f}  "
+                  f"precision {curve['precision'][point]:.4f}  recall {curve['recall'][point]:.4f}  "
+                  f"F1 {curve['f1'][point]:.4f}  cost {curve['cost'][point]:,.0f}")
+
+
+if __name__ == "__main__":
+    report()
@@ -0,0 +1,250 @@
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from src.config import load_params
+from src.data.feature_store import load_features
+
+MODEL_DIR = Path('models')
+
+# Set by src/pipeline.py in its workers: cores the models trained in that process may use
+CORE_LIMIT_ENV = 'TRAIN_CORE_LIMIT'
+
+
+def _dummy(**params):
+    from sklearn.dummy import DummyClassifier
+    return DummyClassifier(**params)
+
+
+def _logistic(**params):
+    from src.models.logistic.online import build_logistic
+    return build_logistic(**params)
+
+
+def _knn(**params):
+    from src.models.KNN.index import build_knn
+    return build_knn(**params)
+
+
+def _svm(**params):
+    from src.models.SVM.approx import build_svm
+    return build_svm(**params)
+
+
+def _rf(**params):
+    from src.models.rf.forest import build_rf
+    return build_rf(**params)
+
+
+def _xgb(**params):
+    from xgboost import XGBClassifier
+    return XGBClassifier(**params)
+
+
+def _fit_xgb(model, X, y, n_threads):
+    from src.models.xgb.hist import fit_hist
+    return fit_hist(model, X, y, n_threads)
+
+
+def _fit_svm(model, X, y, n_threads):
+    from src.models.SVM.approx import fit_svm
+    return fit_svm(model, X, y, n_threads)
+
+
+def _fit_logistic(model, X, y, n_threads):
+    from src.models.logistic.online import fit_online
+    return fit_online(model, X, y, n_threads)
+
+
+def _fit_rf(model, X, y, n_threads):
+    from src.models.rf.forest import fit_rf
+    return fit_rf(model, X, y, n_threads)
+
+
+def _save_rf(model, path):
+    from src.models.rf.forest import save_rf
+    save_rf(model, path)
+
+
+# name -> (estimator factory, default params, thread budget; -1 = every core)
+# The SVMs and the dummy are single-threaded; KNN builds its tree single-threaded and
+# its threshold-fitting queries run on its n_jobs budget
+MODEL_REGISTRY = {
+    'dummy': (_dummy, {}, 1),
+    'logistic': (_logistic, {}, 1),
+    'knn': (_knn, {}, 1),
+    'svm': (_svm, {}, 1),
+    'rf': (_rf, {'class_weight': 'balanced'}, -1),
+    'xgb': (_xgb, {'booster': 'gbtree', 'eta': 0.1, 'scale_pos_weight': 1}, -1),
+}
+
+# Models trained by a custom fit(model, X, y, n_threads) instead of model.fit(X, y)
+FITTERS = {
+    'logistic': _fit_logistic,
+    'rf': _fit_rf,
+    'svm': _fit_svm,
+    'xgb': _fit_xgb,
+}
+
+# Tree models also saved compiled, as a memory-mapped artifact next to the joblib file
+ENGINE_MODELS = ['rf', 'xgb']
+
+# Models saved by a custom save(model, path) instead of joblib.dump(model, path)
+SAVERS = {
+    'rf': _save_rf,
+}
+
+# Training data attached by each worker: {'X': DataFrame, 'y': ndarray}
+_SHARED = {}
+
+
+def model_path(name, model_dir=MODEL_DIR):
+    return Path(model_dir) / f'{name}_model.joblib'
+
+
+def build_model(name, n_threads=1):
+    """Estimator for a registry entry, params.yaml train.params.<name> overriding the defaults"""
+    if name not in MODEL_REGISTRY:
+        raise KeyError(f"❌ Unknown model '{name}', expected one of {sorted(MODEL_REGISTRY)}")
+    factory, defaults, _ = MODEL_REGISTRY[name]
+    params = {**defaults, **(load_params('train').get('params') or {}).get(name, {})}
+    model = factory(**params)
+    # Pin the estimator's own parallelism to its budget (RF/KNN/logistic/XGBoost n_jobs)
+    if 'n_jobs' in model.get_params() and 'n_jobs' not in params:
+        model.set_params(n_jobs=n_threads)
+    return model
+
+
+def thread_budgets(names, n_cores):
+    """Threads per model: the registry budget (or train.threads override) capped to n_cores"""
+    overrides = load_params('train').get('threads') or {}
+    budgets = {}
+    for name in names:
+        threads = overrides.get(name, MODEL_REGISTRY[name][2])
+        budgets[name] = n_cores if threads in (None, -1) else max(1, min(threads, n_cores))
+    return budgets
+
+
+def _to_shared(arr):
+    """Copy an array once into a new shared memory block; returns (block, spec)"""
+    arr = np.ascontiguousarray(arr)
+    block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[:] = arr
+    return block, (block.name, arr.shape, arr.dtype.str)
+
+
+def _attach_shared(X_spec, y_spec, columns):
+    """Pool initializer: map the training data from shared memory without copying it
+
+    The blocks stay open for the worker's lifetime, since fitted estimators (e.g.
+    brute-force KNN) may keep views of X until they are dumped.
+    """
+    views = []
+    for name, shape, dtype in (X_spec, y_spec):
+        block = shared_memory.SharedMemory(name=name)
+        _SHARED.setdefault('blocks', []).append(block)
+        views.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf))
+    _SHARED['X'] = pd.DataFrame(views[0], columns=columns, copy=False)
+    _SHARED['y'] = views[1]
+
+
+def fit_and_save(name, n_threads, model_dir=MODEL_DIR):
+    """Fit one registry model on the attached training data under its thread budget"""
+    start = time.perf_counter()
+    model = build_model(name, n_threads)
+    # Caps BLAS/OpenMP pools too, so concurrent fits do not oversubscribe the cores
+    with threadpool_limits(limits=n_threads):
+        if name in FITTERS:
+            model = FITTERS[name](model, _SHARED['X'], _SHARED['y'], n_threads)
+        else:
+            model.fit(_SHARED['X'], _SHARED['y'])
+
+    # Decision threshold chosen on the validation split, saved with the model
+    from src.models.threshold import fit_threshold
+    model = fit_threshold(model, name)
+
+    path = model_path(name, model_dir)
+    path.parent.mkdir(exist_ok=True)
+    SAVERS.get(name, joblib.dump)(model, path)
+    if name in ENGINE_MODELS:
+        from src.models.artifact import save_engine
+        from src.models.engine import compile_model
+        save_engine(compile_model(model), path.with_suffix('.mmap'))
+    return name, str(path), time.perf_counter() - start
+
+
+def train_models(names, n_jobs=None, model_dir=MODEL_DIR):
+    """Train the selected models concurrently from one copy of the training matrix
+
+    The feature store is read once and copied into shared memory; workers map it
+    instead of receiving pickled copies. Models are started in order whenever
+    their thread budget fits in the free cores. Returns {model: seconds}.
+    """
+    n_cores = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    n_cores = min(n_cores, int(os.environ.get(CORE_LIMIT_ENV, n_cores)))
+    budgets = thread_budgets(names, n_cores)
+
+    # 1. Load the training data once
+    X_train, y_train, meta = load_features('train')
+    y_train = np.asarray(y_train).ravel()
+
+    # 2. A single model trains in this process, no copy needed
+    if len(names) == 1:
+        _SHARED.update(X=X_train, y=y_train)
+        name, path, seconds = fit_and_save(names[0], budgets[names[0]], model_dir)
+        print(f"✅ {name} trained with {budgets[name]} thread(s) in {seconds:.2f}s, saved to {path}")
+        return {name: seconds}
+
+    # 3. Share X and y with the workers
+    X_block, X_spec = _to_shared(X_train)
+    y_block, y_spec = _to_shared(y_train)
+    timings, running, free = {}, {}, n_cores
+    pending = list(names)
+    start_time = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=min(len(names), n_cores), initializer=_attach_shared,
+                                 initargs=(X_spec, y_spec, meta['columns'])) as pool:
+            while pending or running:
+                while pending and (budgets[pending[0]] <= free or not running):
+                    name = pending.pop(0)
+                    free -= budgets[name]
+                    print(f"→ [{name}] training with {budgets[name]} thread(s)")
+                    running[pool.submit(fit_and_save, name, budgets[name], model_dir)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, path, seconds = future.result()
+                    free += budgets[running.pop(future)]
+                    timings[name] = seconds
+                    print(f"✅ {name} trained in {seconds:.2f}s, saved to {path}")
+    finally:
+        for block in (X_block, y_block):
+            block.close()
+            block.unlink()
+
+    wall = time.perf_counter() - start_time
+    print(f"✔ {len(names)} models trained in {wall:.2f}s wall vs {sum(timings.values()):.2f}s serially")
+    return timings
+
+
+def main(names=None):
+    """Train the given models, else train.models from params.yaml (all registered by default)"""
+    params = load_params('train')
+    names = names or params.get('models') or list(MODEL_REGISTRY)
+    try:
+        train_models(names, n_jobs=params.get('n_jobs'))
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
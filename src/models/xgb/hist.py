@@ -0,0 +1,210 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+
+from src.config import load_params
+from src.data.feature_store import FEATURE_STORE_DIR
+
+XGB_PARAMS = load_params('xgb')
+
+# 'sklearn' fits XGBClassifier on the DataFrame, 'cached' trains on a QuantileDMatrix whose
+# quantile cuts are cached between runs, 'external' streams the feature store through
+# ExtMemQuantileDMatrix
+MODE = XGB_PARAMS.get('mode', 'cached')
+MAX_BIN = XGB_PARAMS.get('max_bin', 256)
+BATCH_ROWS = XGB_PARAMS.get('batch_rows', 100_000)
+CACHE_DIR = Path(XGB_PARAMS.get('cache_dir', 'data/interim/xgb_cache'))
+# Stop once validation AUC-PR has not improved for this many rounds; null trains every round
+EARLY_STOPPING_ROUNDS = XGB_PARAMS.get('early_stopping_rounds', 20)
+EVAL_METRIC = 'aucpr'
+
+
+def _store_meta(split, store_dir=FEATURE_STORE_DIR):
+    with open(Path(store_dir) / f'{split}.json') as f:
+        return json.load(f)
+
+
+def reference_rows(dmatrix, X):
+    """Small matrix whose quantile sketch reproduces the cut points of dmatrix (built from X)
+
+    Per feature: the data minimum plus every cut but the last. That is at most max_bin
+    distinct values, which XGBoost keeps as they are, so the sketch of these rows has
+    the same cuts; only the last one (above the data maximum) differs, which changes
+    neither the bin of any value nor any split threshold.
+    """
+    indptr, values = dmatrix.get_quantile_cut()
+    indptr = indptr.astype(np.int64)
+    minimums = np.asarray(X).min(axis=0)
+    columns = [np.append(minimums[j], values[indptr[j] + 1:indptr[j + 1] - 1]) for j in range(len(indptr) - 1)]
+    n_rows = max(len(column) for column in columns)
+    # Shorter columns repeat their values, which leaves their distinct values unchanged
+    return np.column_stack([np.resize(column, n_rows) for column in columns]).astype(np.float32)
+
+
+def _same_cuts(dmatrix, reference):
+    """True when both matrices share every cut point except each feature's last"""
+    (indptr, values), (ref_indptr, ref_values) = dmatrix.get_quantile_cut(), reference.get_quantile_cut()
+    last = indptr[1:].astype(np.int64) - 1
+    return np.array_equal(indptr, ref_indptr) and np.array_equal(np.delete(values, last), np.delete(ref_values, last))
+
+
+def cached_dmatrix(split='train', ref=None, max_bin=MAX_BIN, n_threads=None, store_dir=FEATURE_STORE_DIR,
+                   cache_dir=CACHE_DIR):
+    """QuantileDMatrix of a feature-store split whose quantile sketch is cached between runs
+
+    XGBoost cannot save a QuantileDMatrix, so the first run sketches the split and
+    saves reference_rows of it, keyed by the split's source hash and max_bin (stale
+    references of the split are removed). Later runs rebuild the cuts from that
+    small reference and only quantize the split against them, skipping the sketch.
+    With ref (the training matrix, for eval sets) the split uses ref's cuts.
+    """
+    meta = _store_meta(split, store_dir)
+    X = np.load(Path(store_dir) / f'X_{split}.npy', mmap_mode='r')
+    y = np.load(Path(store_dir) / f'y_{split}.npy', mmap_mode='r')
+    if ref is not None:
+        return xgb.QuantileDMatrix(X, label=y, feature_names=meta['columns'], ref=ref, nthread=n_threads)
+
+    cache_dir = Path(cache_dir)
+    path = cache_dir / f"{split}-{meta['source_hash'][:16]}-{max_bin}.cuts.npy"
+    if path.exists():
+        reference = xgb.QuantileDMatrix(np.load(path), feature_names=meta['columns'], max_bin=max_bin)
+        return xgb.QuantileDMatrix(X, label=y, feature_names=meta['columns'], ref=reference, nthread=n_threads)
+
+    dmatrix = xgb.QuantileDMatrix(X, label=y, feature_names=meta['columns'], max_bin=max_bin, nthread=n_threads)
+    rows = reference_rows(dmatrix, X)
+    if not _same_cuts(dmatrix, xgb.QuantileDMatrix(rows, feature_names=meta['columns'], max_bin=max_bin)):
+        print(f"⚠ xgb: the {split} quantile cuts cannot be rebuilt from a reference, not caching them")
+        return dmatrix
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for stale in cache_dir.glob(f'{split}-*'):
+        stale.unlink()
+    np.save(path, rows)
+    return dmatrix
+
+
+class FeatureStoreIter(xgb.DataIter):
+    """Feed a memory-mapped feature-store split to XGBoost batch_rows rows at a time
+
+    Only the current batch is paged in; the quantized pages XGBoost builds from
+    them are kept under cache_dir rather than in RAM.
+    """
+
+    def __init__(self, split='train', batch_rows=BATCH_ROWS, store_dir=FEATURE_STORE_DIR, cache_dir=CACHE_DIR):
+        self._X = np.load(Path(store_dir) / f'X_{split}.npy', mmap_mode='r')
+        self._y = np.load(Path(store_dir) / f'y_{split}.npy', mmap_mode='r')
+        self._columns = _store_meta(split, store_dir)['columns']
+        self._batch_rows = batch_rows
+        self._start = 0
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        super().__init__(cache_prefix=str(Path(cache_dir) / f'{split}-ext'))
+
+    def next(self, input_data):
+        if self._start >= len(self._X):
+            return False
+        stop = self._start + self._batch_rows
+        input_data(data=np.asarray(self._X[self._start:stop]), label=np.asarray(self._y[self._start:stop]),
+                   feature_names=self._columns)
+        self._start = stop
+        return True
+
+    def reset(self):
+        self._start = 0
+
+
+def external_dmatrix(split='train', batch_rows=BATCH_ROWS, max_bin=MAX_BIN, n_threads=None, ref=None):
+    """Out-of-core quantized DMatrix streamed from the feature store (ref: the training one, for eval sets)"""
+    return xgb.ExtMemQuantileDMatrix(FeatureStoreIter(split, batch_rows), max_bin=max_bin, nthread=n_threads,
+                                     ref=ref)
+
+
+def trim_to_best(booster):
+    """Drop the rounds trained after the best validation score, keeping it recorded
+
+    Returns the booster unchanged when early stopping did not trigger.
+    """
+    attributes = booster.attributes()
+    if 'best_iteration' not in attributes:
+        return booster
+    best = int(attributes['best_iteration'])
+    n_rounds = booster.num_boosted_rounds()
+    if best + 1 < n_rounds:
+        booster = booster[:best + 1]
+    booster.set_attr(best_iteration=str(best), best_score=attributes['best_score'])
+    print(f"✔ xgb: best validation {EVAL_METRIC} {float(attributes['best_score']):.4f} at round "
+          f"{best + 1}/{n_rounds}, trimmed to {booster.num_boosted_rounds()} rounds")
+    return booster
+
+
+def fit_hist(model, X, y, n_threads=1, mode=MODE, early_stopping_rounds=EARLY_STOPPING_ROUNDS):
+    """Fit an XGBClassifier with histogram trees, from the feature store in the fast modes
+
+    The fast modes train a native booster and load it back into the classifier,
+    so the saved artifact is the same XGBClassifier the evaluation and app use.
+    X and y are only used by the 'sklearn' mode. With early_stopping_rounds set,
+    every round is scored on the validation split and the model is trimmed to
+    its best round, which is recorded as the artifact's best_iteration.
+    """
+    if mode not in ('sklearn', 'cached', 'external'):
+        raise ValueError(f"❌ Unknown xgb.mode '{mode}', expected sklearn, cached or external")
+
+    if mode == 'sklearn':
+        if early_stopping_rounds:
+            from src.data.feature_store import load_features
+
+            X_valid, y_valid, _ = load_features('valid')
+            model.set_params(eval_metric=EVAL_METRIC, early_stopping_rounds=early_stopping_rounds)
+            model.fit(X, y, eval_set=[(X_valid, y_valid)], verbose=False)
+        else:
+            model.fit(X, y)
+        booster = model.get_booster()
+    else:
+        params = {k: v for k, v in model.get_xgb_params().items() if v is not None}
+        params['nthread'] = params.pop('n_jobs', n_threads) or n_threads
+        params.setdefault('tree_method', 'hist')
+        params.setdefault('max_bin', MAX_BIN)
+        params['eval_metric'] = EVAL_METRIC
+
+        if mode == 'cached':
+            dtrain = cached_dmatrix('train', max_bin=params['max_bin'], n_threads=n_threads)
+            dvalid = cached_dmatrix('valid', ref=dtrain, n_threads=n_threads)
+        else:
+            dtrain = external_dmatrix('train', n_threads=n_threads)
+            dvalid = external_dmatrix('valid', n_threads=n_threads, ref=dtrain)
+        evals = [(dvalid, 'valid')] if early_stopping_rounds else []
+        booster = xgb.train(params, dtrain, num_boost_round=model.get_num_boosting_rounds(), evals=evals,
+                            early_stopping_rounds=early_stopping_rounds or None, verbose_eval=False)
+
+    model.load_model(bytearray(trim_to_best(booster).save_raw('ubj')))
+    return model
+
+
+def benchmark(n_threads=None):
+    """Time the current DataFrame fit against the cached (cold and warm) and external modes"""
+    import shutil
+
+    from sklearn.metrics import average_precision_score
+
+    from src.data.feature_store import load_features
+    from src.models.train import build_model
+
+    X_train, y_train, _ = load_features('train')
+    X_test, y_test, _ = load_features('test')
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    results = {}
+    for label, mode in [('sklearn (current)', 'sklearn'), ('cached, cold', 'cached'),
+                        ('cached, warm', 'cached'), ('external memory', 'external')]:
+        start = time.perf_counter()
+        model = fit_hist(build_model('xgb', n_threads or 1), X_train, np.asarray(y_train), n_threads, mode)
+        seconds = time.perf_counter() - start
+        auc_pr = average_precision_score(y_test, model.predict_proba(X_test)[:, 1])
+        results[label] = seconds
+        print(f"{label:>20}: {seconds:7.2f}s  ({results['sklearn (current)'] / seconds:.2f}x)  AUC-PR {auc_pr:.4f}")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,222 @@
+import importlib.util
+import os
+import runpy
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import joblib
+from sklearn.preprocessing import MinMaxScaler
+
+from src.config import load_params
+from src.features.feature_engineering import engineer_features, main as feature_engineering_main
+from src.data.storage import read_table
+from src.models.train import CORE_LIMIT_ENV
+from src.Processing.encoder import TypeOneHotEncoder
+from src.Processing.finefeature import build_preprocessor, save_final_features
+from src.Processing.onehot import main as onehot_main, save_encoder
+from src.Processing.scale import main as scale_main, save_scaler
+from src.Processing.selection import final_columns, input_columns, scaled_columns
+from src.Processing.splitting import FEATURED_DATA_PATH, SPLIT_NAMES, load_split, split_and_save_data
+from src.stage_cache import DVC_PATH, load_stage
+
+# A pipeline stage: `args` builds the stage's arguments from the results of its deps,
+# in_pool stages run in a worker process, the others in the main process
+Stage = namedtuple('Stage', ['name', 'deps', 'func', 'args', 'in_pool'])
+
+# EDA stage -> (script, plotting function, featured-data columns it uses; None for all)
+EDA_STAGES = {
+    'fraud_dist': ('notebooks/univariate_analysis/fraud_dist.py', 'plot_fraud_distribution', ['is_fraud']),
+    'cat': ('notebooks/univariate_analysis/cat.py', 'plot_categorical_distributions',
+            ['type', 'name_orig', 'name_dest']),
+    'num': ('notebooks/univariate_analysis/num.py', 'plot_numerical_distributions', None),
+    'bivariate': ('notebooks/bivariate.py', 'plot_fraud_analysis',
+                  ['is_fraud', 'type', 'amount', 'name_orig', 'name_dest']),
+    'multivariate': ('notebooks/multivariate.py', 'plot_correlation_matrix', None),
+}
+
+# dvc.yaml runs every stage as `python -m <module>` from the repo root
+MODELS_PACKAGE = 'src.models.'
+
+
+# ===== Worker-side stage functions (module level so they can be pickled) =====
+
+def run_notebook_function(path, func_name, df):
+    """Load a notebook EDA script by file path (notebooks/ is not a package) and call one function"""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    spec = importlib.util.spec_from_file_location(f'eda_{func_name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    getattr(module, func_name)(df)
+
+
+def run_script(module):
+    """Run a stage module as `python -m module` would, inside the worker"""
+    runpy.run_module(module, run_name='__main__')
+
+
+def _limit_cores(cores):
+    """Worker initializer: models trained in this worker share `cores` cores"""
+    os.environ[CORE_LIMIT_ENV] = str(cores)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+# ===== Main-process stages: DataFrames are handed over in memory =====
+
+def feature_engineering_stage():
+    """Featured data, kept in memory for the split and the EDA stages"""
+    params = load_params('feature_engineering')
+    if params.get('incremental') or params.get('n_jobs') or params.get('chunksize'):
+        # Out-of-core modes never hold the whole frame, read the result back once
+        feature_engineering_main()
+        return read_table(FEATURED_DATA_PATH)
+    return engineer_features(velocity_window=params.get('velocity_window'))
+
+
+def splitting_stage(df):
+    """{split name: (X, y)} restricted to the columns the final features are built from"""
+    params = load_params('splitting')
+    if not params.get('hash_split') and not params.get('index_only'):
+        return split_and_save_data(df=df)
+
+    # Index-only / hash splits are written by the stage itself, then gathered once
+    from src.Processing.splitting import main as splitting_main
+    splitting_main()
+    return {name: load_split(name, columns=input_columns()) for name in SPLIT_NAMES}
+
+
+def onehot_stage(splits):
+    """Fitted `type` encoder, fitted as onehot.py does"""
+    if load_params('processing').get('materialize_intermediate'):
+        # The encoded copies are written by the stage script itself
+        onehot_main()
+        return joblib.load('parameters/one_hot_encoder.joblib')
+    encoder = TypeOneHotEncoder(column='type').fit(splits['train'][0][['type']])
+    save_encoder(encoder)
+    return encoder
+
+
+def scale_stage(splits):
+    """Fitted MinMaxScaler over the kept numerical columns, fitted as scale.py does"""
+    if load_params('processing').get('materialize_intermediate'):
+        # The scaled copies are written by the stage script itself (from the encoded copies)
+        scale_main()
+        return joblib.load('parameters/minmax_scaler.joblib')
+    columns = scaled_columns()
+    scaler = MinMaxScaler().fit(splits['train'][0][columns])
+    save_scaler(scaler)
+    return scaler
+
+
+def finefeature_stage(splits, encoder, scaler):
+    """Final features through the same FraudPreprocessor that finefeature.py saves and the app serves"""
+    preprocessor = build_preprocessor(final_columns(), encoder=encoder, scaler=scaler)
+    for split, name in [('train', 'train'), ('valid', 'val'), ('test', 'test')]:
+        X, y = splits[name]
+        save_final_features(split, preprocessor.transform(X), y)
+    print("✅ Final features and feature store saved")
+
+
+# ===== DAG =====
+
+def _script_stages(dvc_path=DVC_PATH):
+    """Model building / evaluation stages enabled in dvc.yaml, with deps matched on their artifacts"""
+    import yaml
+
+    with open(dvc_path) as f:
+        stages = yaml.safe_load(f)['stages']
+    scripts = {name: stage['cmd'].split()[-1] for name, stage in stages.items()
+               if stage['cmd'].split()[-1].startswith(MODELS_PACKAGE)}
+
+    specs = {name: load_stage(name, dvc_path) for name in scripts}
+    result = []
+    for name, script in scripts.items():
+        # A stage depends on finefeature (the feature store) and on any stage producing its deps
+        deps = ['finefeature'] + [other for other, spec in specs.items() if other != name
+                                  and set(spec['outs']) & set(specs[name]['deps'])]
+        result.append(Stage(name, deps, run_script, lambda results, script=script: (script,), True))
+    return result
+
+
+def build_stages(eda=True, models=True):
+    """Pipeline DAG: the processing chain in memory, EDA and models as parallel worker stages"""
+    stages = [
+        Stage('feature_engineering', [], feature_engineering_stage, lambda r: (), False),
+        Stage('splitting', ['feature_engineering'], splitting_stage,
+              lambda r: (r['feature_engineering'],), False),
+        Stage('onehot', ['splitting'], onehot_stage, lambda r: (r['splitting'],), False),
+        # After onehot: with materialize_intermediate it reads the encoded copies
+        Stage('scale', ['splitting', 'onehot'], scale_stage, lambda r: (r['splitting'],), False),
+        Stage('finefeature', ['splitting', 'onehot', 'scale'], finefeature_stage,
+              lambda r: (r['splitting'], r['onehot'], r['scale']), False),
+    ]
+    if eda:
+        for name, (path, func_name, columns) in EDA_STAGES.items():
+            # Each plot receives only the columns it uses
+            args = (lambda r, path=path, func_name=func_name, columns=columns:
+                    (path, func_name, r['feature_engineering'] if columns is None
+                     else r['feature_engineering'][columns]))
+            stages.append(Stage(name, ['feature_engineering'], run_notebook_function, args, True))
+    if models:
+        stages += _script_stages()
+    return stages
+
+
+def run_pipeline(stages, n_jobs=None):
+    """Run stages in dependency order, independent worker stages concurrently
+
+    Main-process stages run one at a time while the pool works on whatever is
+    ready, so the EDA plots are drawn during the split/encode/scale chain and the
+    models train side by side. The cores are split between the concurrent
+    workers, so each model's thread budget is capped to its share. Returns
+    {stage: seconds}.
+    """
+    n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    n_workers = max(1, min(n_jobs, sum(stage.in_pool for stage in stages)))
+    cores = max(1, os.cpu_count() // n_workers)
+    pending = {stage.name: stage for stage in stages}
+    where = {stage.name: 'worker' if stage.in_pool else 'main' for stage in stages}
+    results, timings, running = {}, {}, {}
+    start_time = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_limit_cores, initargs=(cores,)) as pool:
+        while pending or running:
+            ready = [s for s in pending.values() if all(dep in results for dep in s.deps)]
+            for stage in [s for s in ready if s.in_pool]:
+                print(f"→ [{stage.name}] started in a worker")
+                running[pool.submit(_timed, stage.func, *stage.args(results))] = stage.name
+                del pending[stage.name]
+
+            local = [s for s in ready if not s.in_pool]
+            if local:
+                stage = local[0]
+                print(f"→ [{stage.name}] started")
+                results[stage.name], timings[stage.name] = _timed(stage.func, *stage.args(results))
+                del pending[stage.name]
+                continue
+
+            if not running:
+                raise RuntimeError(f"❌ Unresolvable stage dependencies: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name], timings[name] = future.result()
+                print(f"✔ [{name}] finished in {timings[name]:.2f}s")
+
+    wall = time.perf_counter() - start_time
+    print("\nStage timings:")
+    for name, seconds in timings.items():
+        print(f"{name:>22}: {seconds:8.2f}s  ({where[name]})")
+    print(f"{'total (wall)':>22}: {wall:8.2f}s  vs {sum(timings.values()):.2f}s run serially")
+    return timings
+
+
+if __name__ == "__main__":
+    params = load_params('pipeline')
+    run_pipeline(build_stages(eda=params.get('eda', True), models=params.get('models', True)),
+                 n_jobs=params.get('n_jobs'))
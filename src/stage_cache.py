@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+from src.config import load_params
+from src.data.storage import ACCESSED
+
+DVC_PATH = Path('dvc.yaml')
+
+CACHE_PARAMS = load_params('cache')
+CACHE_DIR = Path(CACHE_PARAMS.get('dir', '.stage_cache'))
+MAX_SIZE_MB = CACHE_PARAMS.get('max_size_mb', 2048)
+
+# (path, size, mtime_ns) -> sha256 of files already hashed, so unchanged inputs are not re-read
+STATE_FILE = 'state.json'
+
+# Params sections every stage depends on through src.data.storage
+SHARED_PARAMS = ['storage']
+
+
+def _interpolate(value, params):
+    """Resolve ${section.key} references the way dvc.yaml does"""
+    def lookup(match):
+        node = params
+        for key in match.group(1).split('.'):
+            node = node[key]
+        return str(node)
+    return re.sub(r'\$\{([\w.]+)\}', lookup, value)
+
+
+def _paths(entries, params):
+    """Normalize dvc.yaml deps/outs entries (plain strings or {path: options}) to paths"""
+    paths = []
+    for entry in entries or []:
+        path = next(iter(entry)) if isinstance(entry, dict) else entry
+        paths.append(_interpolate(path, params).replace('\\', '/'))
+    return paths
+
+
+def load_stage(name, dvc_path=DVC_PATH):
+    """deps, outs and params sections of a stage, read from dvc.yaml so both runners agree"""
+    with open(dvc_path) as f:
+        stages = yaml.safe_load(f)['stages']
+    if name not in stages:
+        raise KeyError(f"❌ Stage '{name}' not found in {dvc_path}")
+    params = load_params()
+    stage = stages[name]
+    return {
+        'deps': _paths(stage.get('deps'), params),
+        'outs': _paths(stage.get('outs'), params),
+        'params': list(stage.get('params') or []),
+    }
+
+
+def _within(path, paths):
+    """True when path is one of paths or lies inside one of them"""
+    return any(path == other or path.startswith(other.rstrip('/') + '/') for other in paths)
+
+
+def _stage_sources():
+    """Source files of the src modules loaded by the running stage"""
+    sources = set()
+    for module_name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if (module_name == 'src' or module_name.startswith('src.') or module_name == '__main__') and path:
+            sources.add(str(Path(path).resolve()))
+    return sorted(sources)
+
+
+class StageCache:
+    """Content-addressed cache of stage outputs with size-bounded LRU eviction
+
+    A stage's key hashes its dependency files (data and code), the source of every
+    src module it has imported, its params sections and its output paths. An entry
+    holds the declared outputs plus every artifact the run wrote through
+    src.data.storage, and the digests of artifacts it read outside its deps (e.g.
+    optional intermediates). A hit requires those reads to be unchanged and copies
+    the outputs back in place (skipping outputs that are already identical) instead
+    of running the stage. File hashes are memoized by size and mtime, so checking
+    an unchanged stage does not re-read its inputs.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_size_mb=MAX_SIZE_MB):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_size_mb * 1024**2)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        state_path = self.cache_dir / STATE_FILE
+        self._state = json.loads(state_path.read_text()) if state_path.exists() else {}
+
+    def _save_state(self):
+        tmp = self.cache_dir / f'{STATE_FILE}.tmp'
+        tmp.write_text(json.dumps(self._state))
+        os.replace(tmp, self.cache_dir / STATE_FILE)
+
+    def _file_digest(self, file):
+        stat = file.stat()
+        signature = f'{stat.st_size}:{stat.st_mtime_ns}'
+        cached = self._state.get(str(file))
+        if cached and cached[0] == signature:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self._state[str(file)] = [signature, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path_digest(self, path):
+        """sha256 of a file, or of every file (with its relative name) under a directory"""
+        path = Path(path)
+        if not path.exists():
+            return 'missing'
+        if path.is_file():
+            return self._file_digest(path)
+        digest = hashlib.sha256()
+        for file in sorted(f for f in path.rglob('*') if f.is_file()):
+            digest.update(str(file.relative_to(path)).encode())
+            digest.update(self._file_digest(file).encode())
+        return digest.hexdigest()
+
+    def key(self, name, deps, outs, params_sections):
+        """Cache key of a stage run"""
+        params = load_params()
+        digest = hashlib.sha256(name.encode())
+        for dep in deps:
+            digest.update(f'{dep}={self.path_digest(dep)}'.encode())
+        for source in _stage_sources():
+            digest.update(f'{source}={self.path_digest(source)}'.encode())
+        for section in list(params_sections) + SHARED_PARAMS:
+            digest.update(f'{section}={json.dumps(params.get(section), sort_keys=True)}'.encode())
+        digest.update(json.dumps(outs).encode())
+        self._save_state()
+        return digest.hexdigest()
+
+    def _entries(self):
+        entries = []
+        for meta_path in self.cache_dir.glob('*/meta.json'):
+            with open(meta_path) as f:
+                entries.append((meta_path.parent, json.load(f)))
+        return entries
+
+    def restore(self, key):
+        """Copy the cached outputs of key back in place; False when not cached or its reads changed"""
+        entry = self.cache_dir / key
+        meta_path = entry / 'meta.json'
+        if not meta_path.exists():
+            return False
+        meta = json.loads(meta_path.read_text())
+        if any(self.path_digest(path) != digest for path, digest in meta.get('reads', {}).items()):
+            return False
+        for i, out in enumerate(meta['outs']):
+            out, cached = Path(out), entry / str(i)
+            if self.path_digest(out) == meta['digests'][i]:
+                continue
+            if out.is_dir():
+                shutil.rmtree(out)
+            elif out.exists():
+                out.unlink()
+            out.parent.mkdir(parents=True, exist_ok=True)
+            if cached.is_dir():
+                shutil.copytree(cached, out)
+            else:
+                shutil.copy2(cached, out)
+
+        # Refresh the entry's LRU position
+        meta['last_used'] = time.time()
+        meta_path.write_text(json.dumps(meta, indent=4))
+        self._save_state()
+        return True
+
+    def store(self, key, name, outs, reads=()):
+        """Copy a stage's outputs into the cache, then evict least recently used entries"""
+        tmp = self.cache_dir / f'{key}.tmp'
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir()
+        size = 0
+        for i, out in enumerate(outs):
+            out, cached = Path(out), tmp / str(i)
+            if out.is_dir():
+                shutil.copytree(out, cached)
+                size += sum(f.stat().st_size for f in cached.rglob('*') if f.is_file())
+            else:
+                shutil.copy2(out, cached)
+                size += cached.stat().st_size
+        meta = {'stage': name, 'outs': outs, 'digests': [self.path_digest(out) for out in outs],
+                'reads': {path: self.path_digest(path) for path in reads},
+                'size': size, 'last_used': time.time()}
+        (tmp / 'meta.json').write_text(json.dumps(meta, indent=4))
+
+        entry = self.cache_dir / key
+        if entry.exists():
+            shutil.rmtree(entry)
+        os.replace(tmp, entry)
+        self._save_state()
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_size_mb"""
+        entries = sorted(self._entries(), key=lambda e: e[1]['last_used'])
+        total = sum(meta['size'] for _, meta in entries)
+        for entry, meta in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry)
+            total -= meta['size']
+            print(f"✔ Stage cache: evicted {meta['stage']} ({meta['size'] / 1024**2:.1f} MB)")
+
+
+def run_stage(name, func, *args, **kwargs):
+    """Run func as dvc.yaml stage `name`, or restore its outputs from the stage cache
+
+    Disabled with cache.enabled: false, in which case func always runs.
+    """
+    if not CACHE_PARAMS.get('enabled', True):
+        return func(*args, **kwargs)
+
+    start_time = time.perf_counter()
+    stage = load_stage(name)
+    cache = StageCache()
+    key = cache.key(name, stage['deps'], stage['outs'], stage['params'])
+    if cache.restore(key):
+        cache.evict()
+        print(f"✔ [{name}] unchanged, outputs restored from the stage cache "
+              f"({time.perf_counter() - start_time:.2f}s)")
+        return None
+
+    for paths in ACCESSED.values():
+        paths.clear()
+    result = func(*args, **kwargs)
+    missing = [out for out in stage['outs'] if not Path(out).exists()]
+    if missing:
+        print(f"❌ [{name}] outputs not produced, not cached: {missing}")
+        return result
+
+    # Outputs written beyond the declared ones (e.g. the processing.materialize_intermediate
+    # copies) are cached too; artifacts read outside the deps are checked on a hit
+    written = sorted(path for path in ACCESSED['written']
+                     if Path(path).exists() and not _within(path, stage['outs']))
+    reads = sorted(path for path in ACCESSED['read']
+                   if not _within(path, stage['deps'] + stage['outs'] + written))
+    cache.store(key, name, stage['outs'] + written, reads)
+    return result
@@ -5,6 +5,8 @@ from xgboost.sklearn import XGBClassifier
 from sklearn.model_selection import GridSearchCV, StratifiedKFold
 from sklearn.metrics import make_scorer, f1_score
 
+from src.data.feature_store import load_features
+
 # Create output directory
 os.makedirs("tuning", exist_ok=True)
 
@@ -29,8 +31,7 @@ gs = GridSearchCV(
 )
 
 # Load data
-X_params_cs = pd.read_csv('data/processed/finefeatures/X_train_finalfeatures.csv')
-y_temp = pd.read_csv('data/processed/split/y_train.csv').squeeze()
+X_params_cs, y_temp, _ = load_features('train')
 
 # # Fit the model
 # gs.fit(X_params_cs, y_temp)